@@ -4,16 +4,13 @@ import importlib
 
 # Now import the required packages
 import streamlit as st
-import pandas as pd
-import numpy as np
-import pickle
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scripts.analysis import run_analysis
 
-# Import the scripts instead of running them as subprocesses
-from scripts.generate_dummy_data import generate_dummy_data_func
-from scripts.train_model import train_churn_model
+# Modul berat (sklearn, matplotlib, seaborn, pyarrow) diimpor di dalam halaman atau fungsi
+# yang membutuhkannya, sehingga cold start hanya membayar import untuk halaman yang dibuka.
+# Daftar modul per halaman ada di scripts/startup_profile.py (PAGE_IMPORTS).
+
+# Warm-up saat proses start (opsional): CHURN_WARM_START=1
+WARM_START = os.environ.get('CHURN_WARM_START') == '1'
 
 # Setting page config
 st.set_page_config(
@@ -22,52 +19,150 @@ st.set_page_config(
     layout="wide"
 )
 
-# Fungsi untuk memuat model
-@st.cache_resource
+# Fungsi untuk memuat model versi aktif dari registry (dikompilasi menjadi tabel node NumPy).
+# Model baru hasil training atau rollback dipakai otomatis tanpa restart aplikasi.
 def load_model():
-    with open('models/churn_model.pkl', 'rb') as file:
-        model = pickle.load(file)
-    return model
+    from scripts.model_registry import default_watcher
+    return default_watcher().get()
+
+# Fungsi untuk memuat scorer berbasis tabel skor (mode lookup, aktif jika tabel sudah dibuat saat training)
+def load_scorer():
+    model = load_model()
+    return build_scorer(model.content_hash or id(model), model)
+
+# Scorer di-cache per versi model; versi sebelumnya tetap disimpan agar rollback instan
+@st.cache_resource(max_entries=2)
+def build_scorer(model_version, _model):
+    from scripts.model_registry import score_table_path
+    from scripts.score_table import SCORE_TABLE_DIR, TableScorer, load_or_build_score_table
+    path = score_table_path(_model)
+    if path is None and _model.registry_version is None and os.path.exists(SCORE_TABLE_DIR):
+        path = SCORE_TABLE_DIR
+    if path is None:
+        return None
+    return TableScorer(_model, load_or_build_score_table(_model, path))
+
+# Template gauge probabilitas churn, dibangun sekali per proses
+@st.cache_resource
+def load_gauge():
+    from scripts.figure_cache import GaugeTemplate
+    return GaugeTemplate()
+
+# Fungsi untuk warm-up sekali per proses: impor modul semua halaman dan muat model,
+# agar request pertama tidak membayar biaya import dan load model
+@st.cache_resource
+def warm_up():
+    from scripts.startup_profile import warm_imports
+    warm_imports()
+    if os.path.exists('models/churn_model.pkl') and load_scorer() is None:
+        load_model()
+    load_gauge()
+    return True
 
 # Fungsi untuk melakukan prediksi
 def predict_churn(age, gender, purchase_amount, tenure):
-    # Buat DataFrame dengan format yang sama seperti data training
-    input_data = pd.DataFrame({
+    # Mode lookup: O(1) untuk input di grid form, cache LRU untuk input di luar grid
+    scorer = load_scorer()
+    if scorer is not None:
+        prediction_proba = scorer.predict_proba_one(age, gender, purchase_amount, tenure)
+        prediction = 1 if prediction_proba >= 0.5 else 0
+        return prediction, prediction_proba
+    
+    # Prediksi satu pelanggan memakai jalur batch yang sama (batch berisi satu baris)
+    input_data = {
         'age': [age],
         'gender': [gender],
         'purchase_amount': [purchase_amount],
         'tenure': [tenure]
-    })
+    }
     
     # Lakukan prediksi
-    model = load_model()
-    prediction_proba = model.predict_proba(input_data)[0][1]
-    prediction = 1 if prediction_proba >= 0.5 else 0
+    from scripts.scoring import predict_churn_batch
+    predictions, probabilities = predict_churn_batch(input_data, model=load_model())
+    prediction = int(predictions[0])
+    prediction_proba = probabilities[0]
     
     return prediction, prediction_proba
 
-# Fungsi untuk menjalankan generate_dummy_data.py
-def generate_dummy_data():
-    try:
-        # Call the function directly instead of as a subprocess
-        results = generate_dummy_data_func()
-        return True, results
-    except Exception as e:
-        return False, f"Error: {str(e)}"
-
-# Fungsi untuk menjalankan train_model.py
-def train_model():
-    try:
-        # Call the function directly instead of as a subprocess
-        model = train_churn_model()
-        return True, "Model successfully trained and saved."
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+# Job runner untuk generate data dan training di proses terpisah (satu per proses Streamlit)
+@st.cache_resource
+def get_job_runner():
+    from scripts.jobs import JobRunner
+    return JobRunner()
+
+# Preview data dummy (ukuran dari metadata + row group pertama), di-cache per fingerprint data
+# agar panel status tidak membaca ulang file Parquet setiap kali halaman digambar
+@st.cache_data(max_entries=1)
+def load_data_preview(data_fingerprint):
+    from scripts.data_store import data_shape, load_customer_data
+    n_rows, n_cols = data_shape()
+    return n_rows, n_cols, load_customer_data(row_groups=[0]).head()
+
+# Progres job yang sedang berjalan, diperbarui tiap detik. Fragment ini hanya digambar selama
+# job masih queued/running; begitu job selesai seluruh halaman digambar ulang sekali sehingga
+# polling berhenti.
+@st.fragment(run_every=1)
+def show_job_progress(kind, job_id):
+    from scripts.jobs import FINAL_STATES
+    runner = get_job_runner()
+    status = runner.status(job_id)
+    if status is None or status['state'] in FINAL_STATES:
+        st.rerun()
+    
+    st.progress(status['progress'], text=status['message'])
+    if st.button('Batalkan', key=f"cancel-{kind}"):
+        runner.cancel(job_id)
+        st.info("Permintaan pembatalan dikirim...")
+
+# Panel status job terakhir untuk satu jenis job. Sesi Streamlit tidak pernah menunggu job;
+# setelah training selesai, penunjuk versi model langsung diperiksa ulang.
+def show_job_status(kind):
+    from scripts.jobs import FINAL_STATES
+    runner = get_job_runner()
+    jobs = runner.jobs(kind)
+    if not jobs:
+        return
+    status = jobs[0]
+    
+    if status['state'] not in FINAL_STATES:
+        show_job_progress(kind, status['job_id'])
+        return
+    
+    if status['state'] == 'succeeded':
+        if runner.acknowledge(status['job_id']):
+            if kind == 'train_model':
+                from scripts.model_registry import default_watcher
+                default_watcher().refresh()
+            st.rerun()
+        if kind == 'generate_data':
+            st.success("✅ Data dummy berhasil dibuat!")
+            from scripts.data_store import PARQUET_PATH, data_available, dataset_fingerprint, row_group_fingerprints
+            if data_available():
+                try:
+                    # Hanya row group pertama yang dibaca untuk preview; ukuran dari metadata
+                    n_rows, n_cols, preview = load_data_preview(
+                        dataset_fingerprint(row_group_fingerprints(PARQUET_PATH))
+                    )
+                    st.write(f"Preview data ({n_rows} baris, {n_cols} kolom):")
+                    st.dataframe(preview)
+                except Exception as e:
+                    st.error(f"Error membaca data: {e}")
+        else:
+            st.success("✅ Model berhasil dilatih!")
+            if os.path.exists('models/churn_model.pkl'):
+                st.write("Model tersimpan di 'models/churn_model.pkl'")
+    elif status['state'] == 'cancelled':
+        st.warning("Job dibatalkan.")
+    else:
+        st.error(f"❌ Job gagal: {status['message']}")
 
 def main():
+    if WARM_START:
+        warm_up()
+    
     # Sidebar untuk navigasi
     st.sidebar.title('Navigasi')
-    pages = ["Prediksi Churn", "Analisis Data", "Persiapan Data & Model"]
+    pages = ["Prediksi Churn", "Prediksi Batch", "Analisis Data", "Persiapan Data & Model"]
     selection = st.sidebar.radio("Pilih Halaman:", pages)
     
     if selection == "Prediksi Churn":
@@ -96,33 +191,26 @@ def main():
         with col2:
             if predict_button:
                 if os.path.exists('models/churn_model.pkl'):
-                    prediction, probability = predict_churn(age, gender, purchase_amount, tenure)
-                    
-                    st.header('Hasil Prediksi')
-                    
-                    # Visualisasi gauge untuk probabilitas churn
-                    fig, ax = plt.subplots(figsize=(6, 3))
-                    
-                    # Membuat gauge chart sederhana
-                    ax.set_xlim(0, 1)
-                    ax.set_ylim(0, 0.5)
-                    ax.set_axis_off()
-                    
-                    # Tambahkan gauge background
-                    ax.barh(0.2, 1, height=0.1, color='lightgrey', alpha=0.5)
+                    from scripts.metrics import profiled, timer
                     
-                    # Tambahkan gauge bar
-                    ax.barh(0.2, probability, height=0.1, color='red' if probability >= 0.5 else 'green')
-                    
-                    # Tambahkan teks
-                    ax.text(0, 0.35, "0%", ha='left', fontsize=12)
-                    ax.text(1, 0.35, "100%", ha='right', fontsize=12)
-                    ax.text(0.5, 0.35, f"{probability*100:.1f}%", ha='center', fontsize=14, fontweight='bold')
-                    
-                    # Title
-                    ax.text(0.5, 0.45, "Probabilitas Churn", ha='center', fontsize=14)
-                    
-                    st.pyplot(fig)
+                    # Tambahkan ?profile=1 di URL untuk memprofil request ini (hanya jika CHURN_PROFILING=1)
+                    with profiled('predict_churn', enabled=st.query_params.get('profile') == '1') as profile:
+                        with timer('predict_churn', component='app'):
+                            prediction, probability = predict_churn(age, gender, purchase_amount, tenure)
+                        
+                        st.header('Hasil Prediksi')
+                        from scripts.figure_cache import FIGURE_CACHE
+                        
+                        # Visualisasi gauge untuk probabilitas churn (template dibuat sekali,
+                        # hanya lebar bar dan label yang diubah; hasil render di-cache per probabilitas)
+                        gauge_value = round(float(probability), 4)
+                        gauge = FIGURE_CACHE.cached(
+                            'gauge', lambda: load_gauge().render(gauge_value, churn=prediction == 1),
+                            params={'probability': gauge_value, 'churn': int(prediction)},
+                        )
+                        st.image(gauge, use_container_width=True)
+                    if profile['path'] is not None:
+                        st.caption(f"Profil request disimpan di {profile['path']}")
                     
                     # Menampilkan hasil keputusan
                     if prediction == 1:
@@ -151,7 +239,60 @@ def main():
                 else:
                     st.error("Model belum tersedia. Silakan kunjungi halaman 'Persiapan Data & Model' untuk membuat data dummy dan melatih model!")
     
+    elif selection == "Prediksi Batch":
+        st.title('Prediksi Churn Batch')
+        st.write("""
+        Upload file pelanggan (CSV atau Parquet) dengan kolom age, gender, purchase_amount, dan tenure.
+        File dinilai per chunk tanpa disimpan ke folder data, dan hasilnya dapat diunduh dengan
+        tambahan kolom churn_probability dan churn_prediction.
+        """)
+        
+        if not os.path.exists('models/churn_model.pkl'):
+            st.error("Model belum tersedia. Silakan kunjungi halaman 'Persiapan Data & Model' untuk membuat data dummy dan melatih model!")
+        else:
+            uploaded_file = st.file_uploader('File pelanggan', type=['csv', 'parquet'])
+            
+            if uploaded_file is not None and st.button('Prediksi Batch'):
+                from scripts.batch_scoring import score_upload
+                progress_bar = st.progress(0.0, text="Membaca file...")
+                try:
+                    result = score_upload(
+                        uploaded_file, uploaded_file.name, model=load_model(),
+                        progress=lambda fraction, message: progress_bar.progress(fraction, text=message),
+                    )
+                except ValueError as e:
+                    progress_bar.empty()
+                    st.error(f"❌ {e}")
+                else:
+                    # Hasil disimpan per sesi; file hasil sebelumnya dihapus
+                    previous = st.session_state.get('batch_result')
+                    if previous is not None and os.path.exists(previous['path']):
+                        os.remove(previous['path'])
+                    st.session_state['batch_result'] = result
+                    progress_bar.progress(1.0, text=f"Selesai dalam {result['seconds']:.1f} detik")
+            
+            result = st.session_state.get('batch_result')
+            if result is not None and os.path.exists(result['path']):
+                st.subheader('Ringkasan Hasil')
+                col1, col2, col3 = st.columns(3)
+                col1.metric('Jumlah pelanggan', f"{result['n_rows']:,}")
+                col2.metric('Berpotensi churn', f"{result['n_churn']:,}", f"{result['churn_rate']:.1%}", delta_color='off')
+                col3.metric('Rata-rata probabilitas churn', f"{result['mean_probability']:.1%}")
+                
+                import pandas as pd
+                n_bins = len(result['probability_bins'])
+                labels = [f"{i / n_bins:.1f}-{(i + 1) / n_bins:.1f}" for i in range(n_bins)]
+                st.write("Distribusi probabilitas churn:")
+                st.bar_chart(pd.DataFrame({'Jumlah pelanggan': result['probability_bins']}, index=labels))
+                
+                with open(result['path'], 'rb') as file:
+                    st.download_button(
+                        'Unduh hasil prediksi', data=file, file_name=result['file_name'],
+                        mime='text/csv' if result['format'] == 'csv' else 'application/octet-stream',
+                    )
+    
     elif selection == "Analisis Data":
+        from scripts.analysis import run_analysis
         run_analysis()
     
     elif selection == "Persiapan Data & Model":
@@ -160,8 +301,10 @@ def main():
         Halaman ini memungkinkan Anda untuk menghasilkan data dummy dan melatih model machine learning.
         """)
         
+        from scripts.data_store import data_available
+        
         # Cek apakah data sudah ada
-        data_exists = os.path.exists('data/customer_data.csv')
+        data_exists = data_available()
         model_exists = os.path.exists('models/churn_model.pkl')
         
         st.subheader('Status:')
@@ -174,24 +317,20 @@ def main():
         st.subheader('Langkah 1: Generate Data Dummy')
         col1, col2 = st.columns([1, 2])
         
+        # Job dijalankan di proses terpisah; halaman ini hanya menampilkan progresnya
+        from scripts.jobs import JobAlreadyRunning
+        runner = get_job_runner()
+        
         with col1:
             gen_data_button = st.button('Generate Data Dummy')
         
         with col2:
             if gen_data_button:
-                with st.spinner('Sedang menghasilkan data dummy...'):
-                    success, output = generate_dummy_data()
-                    if success:
-                        st.success("✅ Data dummy berhasil dibuat!")
-                        if os.path.exists('data/customer_data.csv'):
-                            try:
-                                df = pd.read_csv('data/customer_data.csv')
-                                st.write(f"Preview data ({df.shape[0]} baris, {df.shape[1]} kolom):")
-                                st.dataframe(df.head())
-                            except Exception as e:
-                                st.error(f"Error membaca data: {e}")
-                    else:
-                        st.error(f"❌ Gagal menghasilkan data dummy: {output}")
+                try:
+                    runner.submit('generate_data')
+                except JobAlreadyRunning as e:
+                    st.warning(str(e))
+            show_job_status('generate_data')
         
         st.subheader('Langkah 2: Latih Model')
         col1, col2 = st.columns([1, 2])
@@ -201,17 +340,14 @@ def main():
         
         with col2:
             if train_button:
-                if not os.path.exists('data/customer_data.csv'):
+                if not data_available():
                     st.error("❌ Data pelanggan belum tersedia. Silakan generate data dummy terlebih dahulu!")
                 else:
-                    with st.spinner('Sedang melatih model...'):
-                        success, output = train_model()
-                        if success:
-                            st.success("✅ Model berhasil dilatih!")
-                            if os.path.exists('models/churn_model.pkl'):
-                                st.write("Model tersimpan di 'models/churn_model.pkl'")
-                        else:
-                            st.error(f"❌ Gagal melatih model: {output}")
+                    try:
+                        runner.submit('train_model')
+                    except JobAlreadyRunning as e:
+                        st.warning(str(e))
+            show_job_status('train_model')
         
         if model_exists:
             st.success("✅ Data dan model sudah siap! Silakan kembali ke halaman 'Prediksi Churn' untuk mencoba aplikasi.")
@@ -1,21 +1,49 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import seaborn as sns
-import pickle
-from sklearn.metrics import roc_curve, auc
 import os
 
+from scripts.data_store import dataset_fingerprint, load_customer_data, row_group_fingerprints
+from scripts.evaluation import evaluate_model
+from scripts.figure_cache import FIGURE_CACHE
+from scripts.model_registry import default_watcher
+from scripts.prediction_cache import PredictionCache, compute_performance
+from scripts.summary_stats import load_data_summary
+
+# Fungsi untuk menggambar boxplot per kelas churn dari statistik yang sudah dihitung
+def draw_boxplot(ax, stats):
+    boxes = ax.bxp(stats, patch_artist=True, showfliers=True)
+    for patch, color in zip(boxes['boxes'], sns.color_palette()):
+        patch.set_facecolor(color)
+
+# Fungsi untuk menampilkan chart dari cache gambar; `draw(ax)` hanya dijalankan jika chart
+# dengan versi data/model yang sama belum pernah dirender
+def show_figure(chart_id, draw, figsize=(10, 6), data_version=None, model_version=None):
+    image = FIGURE_CACHE.render(chart_id, draw, figsize=figsize,
+                                data_version=data_version, model_version=model_version)
+    st.image(image, use_container_width=True)
+
 def run_analysis():
     st.title('Analisis Prediksi Churn Pelanggan')
     
-    # Load data
+    # Ringkasan statistik (momen, korelasi, sketch kuantil) dibangun sekali per versi data
+    # dan disimpan per row group; cache Streamlit di-key dengan fingerprint data
     @st.cache_data
-    def load_data():
-        return pd.read_csv('data/customer_data.csv')
+    def load_summary(data_fingerprint):
+        return load_data_summary()
+    
+    data_version = dataset_fingerprint(row_group_fingerprints())
+    summary = load_summary(data_version)
     
-    df = load_data()
+    def load_model():
+        return default_watcher().get()
+    
+    # Model tanpa artifact (content hash) tidak bisa di-cache di disk, jadi dievaluasi langsung per row group
+    def load_performance(model):
+        if model.content_hash is None:
+            return compute_performance(model, evaluate_model(model))
+        return PredictionCache(model).performance()
     
     # Sidebar untuk navigasi
     st.sidebar.title('Navigasi')
@@ -27,100 +55,99 @@ def run_analysis():
         
         # Tampilkan informasi dasar
         st.subheader('Ikhtisar Data')
-        st.write(f"Total Data: {df.shape[0]} baris dan {df.shape[1]} kolom")
+        st.write(f"Total Data: {summary.count} baris dan {len(summary.stats.columns)} kolom")
         
-        # Preview data
+        # Preview data (hanya row group pertama yang dibaca)
         st.subheader('Preview Data')
-        st.dataframe(df.head())
+        st.dataframe(load_customer_data(row_groups=[0]).head())
         
         # Statistik deskriptif
         st.subheader('Statistik Deskriptif')
-        st.dataframe(df.describe())
+        st.dataframe(summary.describe())
         
         # Distribusi churn
         st.subheader('Distribusi Churn')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.countplot(x='churn', data=df, ax=ax)
-        ax.set_title('Distribusi Churn')
-        ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
-        ax.set_ylabel('Jumlah Pelanggan')
-        
-        # Tambahkan angka di atas bar
-        for p in ax.patches:
-            ax.annotate(f'{p.get_height()}', 
-                        (p.get_x() + p.get_width() / 2., p.get_height()),
-                        ha = 'center', va = 'bottom',
-                        xytext = (0, 5), textcoords = 'offset points')
+        def draw_churn_distribution(ax):
+            churn_counts = summary.churn_counts()
+            sns.barplot(x=churn_counts.index, y=churn_counts.values, ax=ax)
+            ax.set_title('Distribusi Churn')
+            ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
+            ax.set_ylabel('Jumlah Pelanggan')
+            
+            # Tambahkan angka di atas bar
+            for p in ax.patches:
+                ax.annotate(f'{p.get_height()}', 
+                            (p.get_x() + p.get_width() / 2., p.get_height()),
+                            ha = 'center', va = 'bottom',
+                            xytext = (0, 5), textcoords = 'offset points')
         
         # Hitung persentase
-        churn_pct = df['churn'].value_counts(normalize=True) * 100
+        churn_pct = summary.churn_distribution() * 100
         st.write(f"Persentase Churn: {churn_pct[1]:.2f}%")
         st.write(f"Persentase Tidak Churn: {churn_pct[0]:.2f}%")
         
-        st.pyplot(fig)
+        show_figure('churn_distribution', draw_churn_distribution, data_version=data_version)
         
     elif page == 'Analisis Fitur':
         st.header('Analisis Fitur')
         
         # Analisis hubungan fitur dengan churn
         st.subheader('Hubungan Fitur dengan Churn')
+        st.caption(
+            "Boxplot digambar dari sketch kuantil KLL per kelas churn; error rank kuartil "
+            f"sekitar ±{summary.quantile_sketch('age', 0).normalized_rank_error:.1%}, "
+            "outlier ditampilkan sebagai sampel."
+        )
         
         # 1. Age vs Churn
         st.write('### Usia vs Churn')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.boxplot(x='churn', y='age', data=df, ax=ax)
-        ax.set_title('Distribusi Usia berdasarkan Status Churn')
-        ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
-        ax.set_ylabel('Usia')
-        st.pyplot(fig)
+        def draw_age(ax):
+            draw_boxplot(ax, summary.boxplot_stats('age'))
+            ax.set_title('Distribusi Usia berdasarkan Status Churn')
+            ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
+            ax.set_ylabel('Usia')
+        show_figure('age_boxplot', draw_age, data_version=data_version)
         
         # 2. Gender vs Churn
         st.write('### Gender vs Churn')
-        gender_churn = pd.crosstab(df['gender'], df['churn'], normalize='index') * 100
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        gender_churn.plot(kind='bar', ax=ax)
-        ax.set_title('Persentase Churn berdasarkan Gender')
-        ax.set_xlabel('Gender')
-        ax.set_ylabel('Persentase (%)')
-        ax.legend(['Tidak Churn', 'Churn'])
-        
-        # Tambahkan label persentase di atas bar
-        for container in ax.containers:
-            ax.bar_label(container, fmt='%.1f%%')
+        def draw_gender(ax):
+            gender_churn = summary.gender_churn_crosstab() * 100
+            gender_churn.plot(kind='bar', ax=ax)
+            ax.set_title('Persentase Churn berdasarkan Gender')
+            ax.set_xlabel('Gender')
+            ax.set_ylabel('Persentase (%)')
+            ax.legend(['Tidak Churn', 'Churn'])
             
-        st.pyplot(fig)
+            # Tambahkan label persentase di atas bar
+            for container in ax.containers:
+                ax.bar_label(container, fmt='%.1f%%')
+        show_figure('gender_churn', draw_gender, data_version=data_version)
         
         # 3. Purchase Amount vs Churn
         st.write('### Jumlah Pembelian vs Churn')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.boxplot(x='churn', y='purchase_amount', data=df, ax=ax)
-        ax.set_title('Distribusi Jumlah Pembelian berdasarkan Status Churn')
-        ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
-        ax.set_ylabel('Jumlah Pembelian')
-        st.pyplot(fig)
+        def draw_purchase_amount(ax):
+            draw_boxplot(ax, summary.boxplot_stats('purchase_amount'))
+            ax.set_title('Distribusi Jumlah Pembelian berdasarkan Status Churn')
+            ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
+            ax.set_ylabel('Jumlah Pembelian')
+        show_figure('purchase_amount_boxplot', draw_purchase_amount, data_version=data_version)
         
         # 4. Tenure vs Churn
         st.write('### Lama Berlangganan vs Churn')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.boxplot(x='churn', y='tenure', data=df, ax=ax)
-        ax.set_title('Distribusi Lama Berlangganan berdasarkan Status Churn')
-        ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
-        ax.set_ylabel('Lama Berlangganan (bulan)')
-        st.pyplot(fig)
+        def draw_tenure(ax):
+            draw_boxplot(ax, summary.boxplot_stats('tenure'))
+            ax.set_title('Distribusi Lama Berlangganan berdasarkan Status Churn')
+            ax.set_xlabel('Churn (0=Tidak, 1=Ya)')
+            ax.set_ylabel('Lama Berlangganan (bulan)')
+        show_figure('tenure_boxplot', draw_tenure, data_version=data_version)
         
         # 5. Correlation Matrix
         st.write('### Matriks Korelasi')
-        # Create a copy to avoid modifying the original dataframe
-        df_corr = df.copy()
-        # Convert gender to numeric
-        df_corr['gender'] = df_corr['gender'].map({'Male': 0, 'Female': 1})
-        
-        corr = df_corr.corr()
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(corr, annot=True, cmap='coolwarm', fmt='.2f', ax=ax)
-        ax.set_title('Matriks Korelasi antar Fitur')
-        st.pyplot(fig)
+        def draw_correlation(ax):
+            # Gender dikodekan Male=0, Female=1
+            sns.heatmap(summary.correlation(), annot=True, cmap='coolwarm', fmt='.2f', ax=ax)
+            ax.set_title('Matriks Korelasi antar Fitur')
+        show_figure('correlation', draw_correlation, figsize=(10, 8), data_version=data_version)
         
     elif page == 'Performa Model':
         st.header('Performa Model')
@@ -131,67 +158,40 @@ def run_analysis():
             st.warning("Model belum dilatih. Jalankan script train_model.py terlebih dahulu.")
             return
         
-        # Load model
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-        
-        # Load data for evaluation
-        X = df.drop('churn', axis=1)
-        y = df['churn']
+        # Load model (artifact array di-mmap, fallback ke pickle)
+        model = load_model()
         
-        # Predictions
-        y_pred_proba = model.predict_proba(X)[:, 1]
+        # Probabilitas dan metrik diambil dari cache di disk (per model dan row group data);
+        # hanya row group yang berubah yang di-score ulang
+        performance = load_performance(model)
+        model_version = model.content_hash or id(model)
         
         # ROC Curve
         st.subheader('ROC Curve')
-        fpr, tpr, thresholds = roc_curve(y, y_pred_proba)
-        roc_auc = auc(fpr, tpr)
-        
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (area = {roc_auc:.2f})')
-        ax.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-        ax.set_xlim([0.0, 1.0])
-        ax.set_ylim([0.0, 1.05])
-        ax.set_xlabel('False Positive Rate')
-        ax.set_ylabel('True Positive Rate')
-        ax.set_title('Receiver Operating Characteristic')
-        ax.legend(loc="lower right")
-        st.pyplot(fig)
+        fpr, tpr = performance['fpr'], performance['tpr']
+        roc_auc = float(performance['auc'])
+        
+        def draw_roc(ax):
+            ax.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (area = {roc_auc:.2f})')
+            ax.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+            ax.set_xlim([0.0, 1.0])
+            ax.set_ylim([0.0, 1.05])
+            ax.set_xlabel('False Positive Rate')
+            ax.set_ylabel('True Positive Rate')
+            ax.set_title('Receiver Operating Characteristic')
+            ax.legend(loc="lower right")
+        show_figure('roc_curve', draw_roc, figsize=(10, 8),
+                    data_version=data_version, model_version=model_version)
         
         # Feature importance
         st.subheader('Feature Importance')
-        if hasattr(model[-1], 'feature_importances_'):
+        if hasattr(model, 'feature_importances_'):
             try:
-                # Try to load feature names from saved information
-                feature_names_path = 'models/feature_names.pkl'
-                if os.path.exists(feature_names_path):
-                    with open(feature_names_path, 'rb') as f:
-                        feature_info = pickle.load(f)
-                    
-                    # Set up feature names list
-                    feature_names = []
-                    
-                    # Add numeric features (no transformation needed for names)
-                    feature_names.extend(feature_info['numeric_features'])
-                    
-                    # Add transformed categorical features
-                    for cat_feature in feature_info['categorical_features']:
-                        # For gender, we only have one feature after OneHotEncoder with drop='first'
-                        # (Male becomes the reference category, only Female gets a column)
-                        if cat_feature == 'gender':
-                            feature_names.append(f"{cat_feature}_Female")
-                        else:
-                            # Handle any other categorical features if you add them in the future
-                            unique_vals = df[cat_feature].unique()
-                            if len(unique_vals) > 1:  # Skip the first category (drop='first')
-                                feature_names.extend([f"{cat_feature}_{val}" for val in unique_vals[1:]])
-                else:
-                    # Fallback: manually define feature names
-                    st.warning("Feature names file not found. Using default feature names.")
-                    feature_names = ['age', 'purchase_amount', 'tenure', 'gender_Female']
+                # Nama fitur hasil preprocessing tersimpan di model
+                feature_names = list(model.feature_names)
                 
                 # Get feature importances
-                importances = model[-1].feature_importances_
+                importances = performance['feature_importances']
                 
                 # Ensure lengths match
                 if len(importances) != len(feature_names):
@@ -205,19 +205,17 @@ def run_analysis():
                     'Importance': importances
                 }).sort_values('Importance', ascending=False)
                 
-                fig, ax = plt.subplots(figsize=(10, 8))
-                sns.barplot(x='Importance', y='Feature', data=feature_imp, ax=ax)
-                ax.set_title('Feature Importance')
-                st.pyplot(fig)
+                def draw_feature_importance(ax):
+                    sns.barplot(x='Importance', y='Feature', data=feature_imp, ax=ax)
+                    ax.set_title('Feature Importance')
+                show_figure('feature_importance', draw_feature_importance, figsize=(10, 8),
+                            model_version=model_version)
             except Exception as e:
                 st.error(f"Error retrieving feature importances: {str(e)}")
                 st.write("For debugging purposes:")
-                st.write(f"Model structure: {model}")
-                if hasattr(model, 'named_steps'):
-                    if 'classifier' in model.named_steps:
-                        st.write(f"Classifier feature importances shape: {model.named_steps['classifier'].feature_importances_.shape}")
-                    if 'preprocessor' in model.named_steps:
-                        st.write(f"Preprocessor transformers: {model.named_steps['preprocessor'].transformers_}")
+                st.write(f"Model: {model.n_estimators} trees, content hash {model.content_hash}")
+                st.write(f"Feature importances shape: {model.feature_importances_.shape}")
+                st.write(f"Feature names: {model.feature_names}")
         else:
             st.write("Feature importance is not available for this model.")
 
@@ -0,0 +1,44 @@
+import os
+import shutil
+import time
+
+# Jumlah versi direktori yang disimpan setelah swap (versi aktif + sebelumnya), agar pembaca
+# yang masih memakai versi lama (misalnya array yang di-mmap) tidak kehilangan filenya
+KEEP_DIRECTORY_VERSIONS = 2
+
+# Fungsi untuk menulis file secara atomik: isi ditulis ke file sementara lalu di-rename,
+# sehingga pembaca hanya pernah melihat file lama atau file baru yang sudah lengkap
+def atomic_write(path, write, mode='wb'):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Fungsi untuk mengganti direktori `path` dengan `tmp_path` secara atomik. `path` berupa symlink
+# ke direktori versi (.<nama>.<timestamp>); symlink baru dibuat lalu di-rename menimpa yang lama.
+# Pembaca sebaiknya me-resolve path sekali (os.path.realpath) lalu membaca semua file dari sana.
+def swap_directory(tmp_path, path, keep=KEEP_DIRECTORY_VERSIONS):
+    parent, name = os.path.split(os.path.abspath(path))
+    version_name = f".{name}.{time.time_ns()}"
+    os.rename(tmp_path, os.path.join(parent, version_name))
+
+    link_path = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(version_name, link_path)
+
+    # Layout lama: direktori biasa (bukan symlink) tidak bisa ditimpa rename, jadi dihapus dulu
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    os.replace(link_path, path)
+
+    versions = sorted(entry for entry in os.listdir(parent) if entry.startswith(f".{name}."))
+    for old_version in versions[:-keep]:
+        shutil.rmtree(os.path.join(parent, old_version), ignore_errors=True)
@@ -0,0 +1,267 @@
+import itertools
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from scripts.scoring import FEATURE_COLUMNS, NUMERIC_FEATURES, predict_churn_batch
+
+# Jumlah baris per chunk untuk file Parquet. File CSV dibaca per blok CSV_BLOCK_SIZE byte
+# (sekitar 100 ribu baris untuk data pelanggan), sehingga memori sebanding ukuran chunk, bukan ukuran file.
+CHUNK_ROWS = 100000
+CSV_BLOCK_SIZE = 4 << 20
+
+# Scoring paralel: paling banyak MAX_WORKERS proses (dan selalu menyisakan satu core untuk
+# server Streamlit), hanya untuk file dengan perkiraan minimal PARALLEL_MIN_ROWS baris. File yang
+# lebih kecil dinilai di proses ini karena lebih cepat daripada mengirim chunk ke worker.
+MAX_WORKERS = 4
+PARALLEL_MIN_ROWS = 250000
+
+# Jumlah bin distribusi probabilitas churn pada ringkasan hasil
+SUMMARY_BINS = 10
+
+# Direktori file hasil scoring. File yang lebih lama dari RESULT_TTL_SECONDS (dan file di luar
+# MAX_RESULTS terbaru) dihapus setiap kali ada upload baru, sehingga hasil dari sesi yang sudah
+# ditinggalkan tidak menumpuk.
+BATCH_RESULTS_DIR = 'models/batch_results'
+RESULT_PREFIX = 'churn-scored-'
+RESULT_TTL_SECONDS = 3600
+MAX_RESULTS = 20
+
+FILE_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+
+# Fungsi untuk menentukan format file upload dari ekstensinya
+def detect_format(file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in FILE_FORMATS:
+        raise ValueError(f"Format file tidak didukung: '{extension}' (gunakan .csv atau .parquet)")
+    return FILE_FORMATS[extension]
+
+# Fungsi untuk membaca file upload per chunk tanpa memuat seluruh isinya ke DataFrame.
+# Menghasilkan (RecordBatch, porsi file yang sudah dibaca). Kolom dikembalikan apa adanya agar
+# file hasil berisi data pengguna tanpa perubahan: Parquet dengan schema aslinya, CSV dengan
+# semua kolom sebagai string (tanpa inferensi tipe, jadi misalnya "000123" tetap "000123").
+def iter_upload_batches(file, file_format, chunk_rows=CHUNK_ROWS):
+    if file_format == 'parquet':
+        parquet_file = pq.ParquetFile(file)
+        total_rows = max(parquet_file.metadata.num_rows, 1)
+        rows_read = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            rows_read += batch.num_rows
+            yield batch, rows_read / total_rows
+        return
+
+    file.seek(0, os.SEEK_END)
+    total_bytes = max(file.tell(), 1)
+    read_options = pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE)
+    # Nama kolom diambil dari reader pertama, lalu file dibaca ulang dengan semua kolom string
+    file.seek(0)
+    column_names = pa_csv.open_csv(file, read_options=read_options).schema.names
+    file.seek(0)
+    reader = pa_csv.open_csv(
+        file,
+        read_options=read_options,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in column_names}, strings_can_be_null=True,
+        ),
+    )
+    # Reader Arrow membaca sumber lebih dulu (read-ahead), jadi posisi file tidak bisa dipakai
+    # sebagai progres; setiap batch berasal dari satu blok sekitar CSV_BLOCK_SIZE byte
+    for i, batch in enumerate(reader):
+        yield batch, min((i + 1) * CSV_BLOCK_SIZE / total_bytes, 1.0)
+
+# Fungsi untuk mengambil kolom fitur dari satu RecordBatch sebagai dict berisi array NumPy.
+# Kolom numerik di-cast ke float64 (kolom CSV dibaca sebagai string). Kolom kategorikal
+# di-dictionary-encode dulu, karena mengubah jutaan string Arrow satu per satu menjadi objek
+# Python jauh lebih lambat daripada menilai barisnya.
+def batch_features(batch):
+    missing = [col for col in FEATURE_COLUMNS if col not in batch.schema.names]
+    if missing:
+        raise ValueError(f"Kolom tidak ditemukan pada file: {missing}")
+
+    features = {}
+    for col in FEATURE_COLUMNS:
+        column = batch.column(col)
+        if column.null_count:
+            raise ValueError(f"Kolom '{col}' berisi {column.null_count} nilai kosong")
+        if col in NUMERIC_FEATURES:
+            features[col] = pc.cast(column, pa.float64()).to_numpy()
+            continue
+        if not pa.types.is_dictionary(column.type):
+            column = pc.dictionary_encode(column)
+        features[col] = column.dictionary.to_numpy(zero_copy_only=False)[column.indices.to_numpy()]
+    return features
+
+# Fungsi untuk menghapus file hasil yang kedaluwarsa atau melebihi MAX_RESULTS file terbaru
+def prune_results(results_dir=BATCH_RESULTS_DIR, ttl_seconds=RESULT_TTL_SECONDS, max_results=MAX_RESULTS):
+    if not os.path.isdir(results_dir):
+        return
+    results = []
+    for name in os.listdir(results_dir):
+        path = os.path.join(results_dir, name)
+        try:
+            if name.startswith(RESULT_PREFIX):
+                results.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            pass
+    now = time.time()
+    for i, (mtime, path) in enumerate(sorted(results, reverse=True)):
+        if i >= max_results or now - mtime > ttl_seconds:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+# Model untuk proses worker, dimuat sekali per proses lewat initializer pool
+_worker_model = None
+
+# Pool worker dipakai ulang antar upload (dan dibagi oleh upload yang berjalan bersamaan),
+# satu per versi model: key -> [pool, jumlah pemakai]. Pool versi lama dimatikan saat tidak dipakai.
+_pools = {}
+_pool_lock = threading.Lock()
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+def _score_in_worker(features, threshold):
+    return predict_churn_batch(features, model=_worker_model, threshold=threshold)
+
+# Jumlah worker default: semua core kecuali satu (seperti resolve_cpu_budget), maksimal MAX_WORKERS
+def default_workers():
+    return max(1, min(MAX_WORKERS, (os.cpu_count() or 1) - 1))
+
+# Context manager untuk meminjam pool worker model ini. Worker dibuat dengan metode 'spawn' karena
+# proses Streamlit memakai banyak thread (sama seperti jobs.py), dan baru dijalankan saat dibutuhkan.
+@contextmanager
+def worker_pool(model, n_workers):
+    key = (model.content_hash or id(model), n_workers)
+    with _pool_lock:
+        entry = _pools.get(key)
+        if entry is None:
+            for idle in [k for k, (_, users) in _pools.items() if users == 0]:
+                _pools.pop(idle)[0].shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(model,))
+            entry = _pools[key] = [pool, 0]
+        entry[1] += 1
+    try:
+        yield entry[0]
+    except BrokenProcessPool:
+        # Worker mati (misalnya kehabisan memori): pool dibuang agar upload berikutnya membuat yang baru
+        with _pool_lock:
+            if _pools.get(key) is entry:
+                del _pools[key]
+        entry[0].shutdown(wait=False)
+        raise
+    finally:
+        with _pool_lock:
+            entry[1] -= 1
+
+# Fungsi untuk menilai chunk secara berurutan. File yang diperkirakan berisi minimal
+# PARALLEL_MIN_ROWS baris (dari porsi file yang terbaca pada chunk pertama) dinilai paralel di
+# pool worker, tetapi paling banyak n_workers + 1 chunk yang sedang diproses, sehingga memori
+# tetap terbatas dan hasil keluar dengan urutan yang sama seperti file input.
+def iter_scored_batches(batches, model, threshold=0.5, n_workers=1):
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None:
+        return
+    batches = itertools.chain([first], batches)
+    estimated_rows = first[0].num_rows / max(first[1], 1e-9)
+
+    if n_workers <= 1 or estimated_rows < PARALLEL_MIN_ROWS:
+        for batch, fraction in batches:
+            yield batch, fraction, predict_churn_batch(batch_features(batch), model=model, threshold=threshold)
+        return
+
+    with worker_pool(model, n_workers) as executor:
+        pending = deque()
+        for batch, fraction in batches:
+            pending.append((batch, fraction, executor.submit(_score_in_worker, batch_features(batch), threshold)))
+            if len(pending) > n_workers:
+                batch, fraction, future = pending.popleft()
+                yield batch, fraction, future.result()
+        while pending:
+            batch, fraction, future = pending.popleft()
+            yield batch, fraction, future.result()
+
+# Fungsi untuk menilai file pelanggan (CSV atau Parquet) yang diupload dan menulis hasilnya
+# (kolom input + churn_probability + churn_prediction) ke file baru di output_dir dengan format
+# yang sama. `file` adalah objek file biner yang bisa di-seek (misalnya UploadedFile Streamlit);
+# file input tidak disalin ke data/. Mengembalikan ringkasan hasil beserta path file output.
+def score_upload(file, file_name, model=None, threshold=0.5, chunk_rows=CHUNK_ROWS, n_workers=None,
+                 output_dir=BATCH_RESULTS_DIR, progress=None):
+    if model is None:
+        from scripts.scoring import load_compiled_model
+        model = load_compiled_model()
+    if n_workers is None:
+        n_workers = default_workers()
+
+    file_format = detect_format(file_name)
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    prune_results(output_dir)
+    fd, output_path = tempfile.mkstemp(suffix=f'.{file_format}', prefix=RESULT_PREFIX, dir=output_dir)
+    os.close(fd)
+
+    n_rows = n_churn = 0
+    probability_sum = 0.0
+    probability_bins = np.zeros(SUMMARY_BINS, dtype=np.int64)
+    writer = None
+    try:
+        batches = iter_upload_batches(file, file_format, chunk_rows)
+        for batch, fraction, (predictions, probabilities) in iter_scored_batches(batches, model, threshold, n_workers):
+            scored = (batch
+                      .append_column('churn_probability', pa.array(probabilities, type=pa.float64()))
+                      .append_column('churn_prediction', pa.array(predictions, type=pa.int64())))
+            if writer is None:
+                writer = (pq.ParquetWriter(output_path, scored.schema) if file_format == 'parquet'
+                          else pa_csv.CSVWriter(output_path, scored.schema))
+            writer.write_batch(scored)
+
+            n_rows += len(probabilities)
+            n_churn += int(predictions.sum())
+            probability_sum += float(probabilities.sum())
+            probability_bins += np.bincount(
+                np.clip((probabilities * SUMMARY_BINS).astype(np.int64), 0, SUMMARY_BINS - 1),
+                minlength=SUMMARY_BINS,
+            )
+            if progress is not None:
+                progress(fraction, f"{n_rows:,} pelanggan dinilai")
+    except pa.ArrowInvalid as e:
+        os.remove(output_path)
+        raise ValueError(f"File tidak bisa dibaca: {e}") from e
+    except BaseException:
+        os.remove(output_path)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if n_rows == 0:
+        os.remove(output_path)
+        raise ValueError("File tidak berisi data pelanggan")
+
+    return {
+        'path': output_path,
+        'file_name': f"{os.path.splitext(os.path.basename(file_name))[0]}_scored.{file_format}",
+        'format': file_format,
+        'n_rows': n_rows,
+        'n_churn': n_churn,
+        'churn_rate': n_churn / n_rows,
+        'mean_probability': probability_sum / n_rows,
+        'probability_bins': probability_bins.tolist(),
+        'seconds': time.perf_counter() - started,
+    }
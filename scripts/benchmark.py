@@ -0,0 +1,307 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+
+import numpy as np
+
+from scripts.data_store import load_customer_data
+from scripts.generate_dummy_data import generate_dummy_data_func
+from scripts.model_registry import score_table_path
+from scripts.prediction_cache import PredictionCache
+from scripts.score_table import TableScorer, load_or_build_score_table
+from scripts.scoring import FEATURE_COLUMNS, load_churn_model, load_compiled_model, predict_churn_batch
+from scripts.summary_stats import load_data_summary
+from scripts.train_model import train_churn_model
+
+BENCHMARK_REPORT_PATH = 'models/benchmark_report.json'
+
+# Ukuran benchmark default, dan versi kecil (--quick) untuk pemeriksaan cepat
+DEFAULT_CONFIG = {
+    'seed': 42,
+    'fixture_rows': 100000,
+    'generate_sizes': [100000, 1000000],
+    'train_sizes': [10000, 50000, 100000],
+    'batch_sizes': [1, 10, 100, 1000, 10000, 100000],
+    'single_requests': 2000,
+    'cold_start_runs': 5,
+    'cpu_budget': None,
+}
+QUICK_CONFIG = dict(
+    DEFAULT_CONFIG,
+    fixture_rows=20000,
+    generate_sizes=[20000],
+    train_sizes=[5000],
+    batch_sizes=[1, 100, 10000],
+    single_requests=300,
+    cold_start_runs=2,
+)
+
+SUITES = ['generate_data', 'train_model', 'load_model', 'predict_single', 'predict_batch', 'analysis_pages']
+
+# Regresi dilaporkan jika metrik memburuk lebih dari 20% dibanding baseline
+REGRESSION_RATIO = 0.2
+
+# Latency di bawah batas ini (mis. lookup tabel skor, beberapa mikrodetik) tidak dibandingkan,
+# karena fluktuasi relatifnya jauh lebih besar dari 20%
+NOISE_FLOOR_MS = 0.1
+
+# Waktu minimum per ukuran batch agar hasil throughput stabil
+MIN_BATCH_SECONDS = 0.5
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Direktori kerja sementara: semua script memakai path relatif (data/, models/), sehingga
+# benchmark tidak pernah menyentuh data dan model milik aplikasi
+@contextmanager
+def workspace():
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='churn-benchmark-') as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
+
+# Output script (preview data, classification report) tidak ikut ditampilkan
+@contextmanager
+def quiet():
+    with redirect_stdout(io.StringIO()):
+        yield
+
+def _timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+    }
+
+def bench_generate_data(config):
+    results = {}
+    with workspace():
+        for n_samples in config['generate_sizes']:
+            with quiet():
+                seconds, _ = _timed(lambda: generate_dummy_data_func(n_samples, seed=config['seed']))
+            results[f"n={n_samples}"] = {'time_s': seconds, 'rows_per_s': n_samples / seconds}
+    return results
+
+def bench_train_model(config):
+    results = {}
+    with workspace():
+        for n_samples in config['train_sizes']:
+            with quiet():
+                generate_dummy_data_func(n_samples, seed=config['seed'])
+                seconds, _ = _timed(lambda: train_churn_model(build_score_table=False,
+                                                              cpu_budget=config['cpu_budget']))
+            results[f"n={n_samples}"] = {'time_s': seconds, 'rows_per_s': n_samples / seconds}
+    return results
+
+# Data dan model bersama untuk benchmark scoring, load, dan halaman analisis
+def prepare_fixture(config):
+    with quiet():
+        generate_dummy_data_func(config['fixture_rows'], seed=config['seed'])
+        train_churn_model(build_score_table=True, cpu_budget=config['cpu_budget'])
+
+# Cold start di interpreter baru (import + load), seperti proses server atau worker yang baru dibuat
+def bench_load_model(config):
+    code = (
+        "import time; started = time.perf_counter()\n"
+        "from scripts.scoring import load_compiled_model; load_compiled_model()\n"
+        "print(time.perf_counter() - started)"
+    )
+    env = dict(os.environ, PYTHONPATH=_REPO_ROOT)
+    cold_start = []
+    for _ in range(config['cold_start_runs']):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True)
+        cold_start.append(float(result.stdout.strip().splitlines()[-1]))
+
+    artifact_s, _ = _timed(load_compiled_model)
+    pickle_s, _ = _timed(load_churn_model)
+    return {
+        'cold_start_ms': float(np.median(cold_start)) * 1000,
+        'load_artifact_ms': artifact_s * 1000,
+        'load_pickle_ms': pickle_s * 1000,
+    }
+
+# Latency satu pelanggan, untuk kedua jalur predict_churn di app: lookup tabel skor dan model
+def bench_predict_single(config):
+    model = load_compiled_model()
+    scorer = TableScorer(model, load_or_build_score_table(model, score_table_path(model)))
+    rng = np.random.default_rng(config['seed'])
+    n = config['single_requests']
+    inputs = list(zip(
+        rng.integers(18, 81, n).tolist(),
+        rng.choice(['Male', 'Female'], n).tolist(),
+        (rng.integers(0, 30, n) * 100000).tolist(),
+        rng.integers(1, 121, n).tolist(),
+    ))
+
+    lookup = []
+    for row in inputs:
+        seconds, _ = _timed(lambda: scorer.predict_proba_one(*row))
+        lookup.append(seconds)
+
+    direct = []
+    for row in inputs:
+        features = {col: [value] for col, value in zip(FEATURE_COLUMNS, row)}
+        seconds, _ = _timed(lambda: predict_churn_batch(features, model=model))
+        direct.append(seconds)
+    return {'lookup': latency_summary(lookup), 'model': latency_summary(direct)}
+
+def bench_predict_batch(config):
+    model = load_compiled_model()
+    df = load_customer_data(columns=FEATURE_COLUMNS)
+    results = {}
+    for batch_size in config['batch_sizes']:
+        batch = df.iloc[:batch_size]
+        features = {col: batch[col].to_numpy() for col in FEATURE_COLUMNS}
+        timings = []
+        while sum(timings) < MIN_BATCH_SECONDS or len(timings) < 3:
+            seconds, _ = _timed(lambda: predict_churn_batch(features, model=model))
+            timings.append(seconds)
+        median = float(np.median(timings))
+        results[f"batch={len(batch)}"] = {'latency_ms': median * 1000, 'rows_per_s': len(batch) / median}
+    return results
+
+# Persiapan data tiap halaman analisis tanpa Streamlit: cold (cache kosong) dan warm (cache terisi)
+def bench_analysis_pages(config):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        summary_dir = os.path.join(cache_dir, 'summary')
+        cold_s, _ = _timed(lambda: load_data_summary(cache_dir=summary_dir))
+        warm_s, summary = _timed(lambda: load_data_summary(cache_dir=summary_dir))
+        explore_s, _ = _timed(lambda: (summary.describe(), summary.churn_distribution(), summary.churn_counts()))
+        features_s, _ = _timed(lambda: (
+            [summary.boxplot_stats(col) for col in ('age', 'purchase_amount', 'tenure')],
+            summary.gender_churn_crosstab(),
+            summary.correlation(),
+        ))
+
+        model = load_compiled_model()
+        predictions_dir = os.path.join(cache_dir, 'predictions')
+        performance_cold_s, _ = _timed(lambda: PredictionCache(model, path=predictions_dir).performance())
+        performance_warm_s, _ = _timed(lambda: PredictionCache(model, path=predictions_dir).performance())
+    return {
+        'summary_cold_ms': cold_s * 1000,
+        'summary_warm_ms': warm_s * 1000,
+        'eksplorasi_data_ms': explore_s * 1000,
+        'analisis_fitur_ms': features_s * 1000,
+        'performa_model_cold_ms': performance_cold_s * 1000,
+        'performa_model_warm_ms': performance_warm_s * 1000,
+    }
+
+BENCHMARKS = {
+    'generate_data': bench_generate_data,
+    'train_model': bench_train_model,
+    'load_model': bench_load_model,
+    'predict_single': bench_predict_single,
+    'predict_batch': bench_predict_batch,
+    'analysis_pages': bench_analysis_pages,
+}
+
+# Suite yang membutuhkan data dan model fixture
+FIXTURE_SUITES = {'load_model', 'predict_single', 'predict_batch', 'analysis_pages'}
+
+def environment_info():
+    import pandas as pd
+    import sklearn
+    return {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+# Fungsi untuk menjalankan suite benchmark; semua input dibuat ulang dari seed yang sama
+def run_benchmarks(suites=None, config=None):
+    suites = SUITES if suites is None else suites
+    config = DEFAULT_CONFIG if config is None else config
+    report = {'config': config, 'environment': environment_info(), 'results': {}}
+
+    for suite in [s for s in suites if s not in FIXTURE_SUITES]:
+        print(f"Running {suite}...")
+        report['results'][suite] = BENCHMARKS[suite](config)
+
+    fixture_suites = [s for s in suites if s in FIXTURE_SUITES]
+    if fixture_suites:
+        with workspace():
+            print(f"Preparing fixture ({config['fixture_rows']} rows)...")
+            prepare_fixture(config)
+            for suite in fixture_suites:
+                print(f"Running {suite}...")
+                report['results'][suite] = BENCHMARKS[suite](config)
+    return report
+
+# Fungsi untuk meratakan hasil menjadi {"suite.case.metric": nilai}
+def flatten_results(results, prefix=''):
+    flat = {}
+    for name, value in results.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict):
+            flat.update(flatten_results(value, f"{key}."))
+        else:
+            flat[key] = value
+    return flat
+
+# Metrik throughput (*_per_s) lebih baik jika naik; metrik waktu lebih baik jika turun
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+# Fungsi untuk membandingkan laporan dengan baseline; mengembalikan daftar metrik yang memburuk
+def find_regressions(report, baseline, ratio=REGRESSION_RATIO):
+    current = flatten_results(report['results'])
+    previous = flatten_results(baseline['results'])
+    regressions = []
+    for metric, after in current.items():
+        before = previous.get(metric)
+        if not before or (metric.endswith('_ms') and max(before, after) < NOISE_FLOOR_MS):
+            continue
+        change = (before - after) / before if higher_is_better(metric) else (after - before) / before
+        if change > ratio:
+            regressions.append((metric, before, after))
+    return regressions
+
+def print_report(report):
+    for metric, value in flatten_results(report['results']).items():
+        print(f"  {metric:<55} {value:14.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scoring, training, load model, dan halaman analisis")
+    parser.add_argument('--suite', action='append', choices=SUITES, help="Suite yang dijalankan (default: semua)")
+    parser.add_argument('--quick', action='store_true', help="Ukuran kecil untuk pemeriksaan cepat")
+    parser.add_argument('--output', default=None, help=f"Simpan laporan JSON (misalnya {BENCHMARK_REPORT_PATH})")
+    parser.add_argument('--baseline', default=None,
+                        help="Bandingkan dengan laporan JSON sebelumnya; exit code 1 jika ada regresi")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_RATIO,
+                        help="Batas perubahan relatif yang dianggap regresi (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.suite, QUICK_CONFIG if args.quick else DEFAULT_CONFIG)
+    print_report(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.threshold)
+        for metric, before, after in regressions:
+            print(f"REGRESSION {metric}: {before:.3f} -> {after:.3f}")
+        sys.exit(1 if regressions else 0)
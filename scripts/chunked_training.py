@@ -0,0 +1,213 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_limits
+
+from scripts.compiled_model import compile_model
+from scripts.data_store import PARQUET_PATH, churn_labels, ensure_store, model_features, open_parquet, to_frame
+from scripts.evaluation import ScoreHistogram, print_evaluation
+from scripts.incremental_training import update_reservoir
+from scripts.summary_stats import CustomerSummary
+from scripts.train_model import (
+    NUMERIC_FEATURES, build_pipeline, print_phase_timings, report_progress, resolve_cpu_budget,
+    save_reservoir, save_trained_model, timed_phase, write_training_report,
+)
+
+# Jumlah baris maksimal yang dibaca satu worker sekaligus. Satu partisi berisi row group
+# berurutan sampai batas ini (row group yang lebih besar dari batas menjadi satu partisi sendiri).
+DEFAULT_CHUNK_ROWS = 500000
+
+# Porsi baris yang disisihkan untuk evaluasi, sama seperti test_size di train_churn_model
+TEST_FRACTION = 0.2
+
+# Fungsi untuk membagi row group menjadi partisi; mengembalikan (daftar row group, jumlah baris)
+def plan_partitions(path=PARQUET_PATH, chunk_rows=DEFAULT_CHUNK_ROWS):
+    metadata = open_parquet(path).metadata
+    partitions = []
+    row_groups, n_rows = [], 0
+    for i in range(metadata.num_row_groups):
+        rg_rows = metadata.row_group(i).num_rows
+        if row_groups and n_rows + rg_rows > chunk_rows:
+            partitions.append((row_groups, n_rows))
+            row_groups, n_rows = [], 0
+        row_groups.append(i)
+        n_rows += rg_rows
+    if row_groups:
+        partitions.append((row_groups, n_rows))
+    return partitions
+
+# Fungsi untuk membagi pohon ke partisi sebanding jumlah barisnya (metode sisa terbesar).
+# Setiap partisi mendapat minimal satu pohon agar tidak ada data yang tidak terpakai.
+def allocate_trees(n_estimators, partition_rows):
+    rows = np.asarray(partition_rows, dtype=np.float64)
+    n_trees = max(n_estimators, len(rows))
+    quota = n_trees * rows / rows.sum()
+    allocation = np.maximum(np.floor(quota).astype(int), 1)
+    remainder = quota - np.floor(quota)
+    for i in np.argsort(-remainder):
+        if allocation.sum() >= n_trees:
+            break
+        allocation[i] += 1
+    return allocation.tolist()
+
+# Fungsi untuk menentukan baris test di satu row group. Hanya bergantung pada seed dan nomor
+# row group, sehingga setiap pass (scaler, training, evaluasi) dan setiap worker melihat split yang sama.
+def test_mask(n_rows, row_group, seed):
+    return np.random.default_rng([seed, row_group]).random(n_rows) < TEST_FRACTION
+
+def read_split(parquet_file, row_group, seed):
+    df = to_frame(parquet_file.read_row_group(row_group))
+    mask = test_mask(len(df), row_group, seed)
+    return df, mask
+
+# Pass pertama (streaming, satu row group sekaligus): fit preprocessor pada baris training,
+# dengan StandardScaler diperbarui lewat partial_fit, sekaligus membangun ringkasan data
+# dan sampel reservoir untuk training incremental
+def fit_preprocessor(path=PARQUET_PATH, seed=42):
+    parquet_file = open_parquet(path)
+    preprocessor = build_pipeline().named_steps['preprocessor']
+    summary = CustomerSummary()
+    reservoir = None
+    n_train = 0
+    for i in range(parquet_file.metadata.num_row_groups):
+        df, mask = read_split(parquet_file, i, seed)
+        features = model_features(df[~mask])
+        if n_train == 0:
+            preprocessor.fit(features)
+        else:
+            preprocessor.named_transformers_['num'].partial_fit(features[NUMERIC_FEATURES])
+        n_train += len(features)
+
+        # Seed per row group agar reservoir sama di setiap run; elemen ketiga memisahkan stream
+        # acaknya dari test_mask yang memakai [seed, row group]
+        reservoir = update_reservoir(df.iloc[:0] if reservoir is None else reservoir, df, summary.count,
+                                     seed=[seed, i, 1])
+        summary.update(df)
+    return preprocessor, summary, reservoir, n_train
+
+# Fungsi untuk melatih sekelompok pohon pada satu partisi; dijalankan di proses worker.
+# Memori yang dipakai sebanding dengan jumlah baris partisi, bukan ukuran dataset.
+def fit_partition(path, row_groups, n_trees, random_state, preprocessor, seed):
+    parquet_file = open_parquet(path)
+    chunks = []
+    for i in row_groups:
+        df, mask = read_split(parquet_file, i, seed)
+        chunks.append(df[~mask])
+    train = pd.concat(chunks, ignore_index=True)
+    y = churn_labels(train)
+    if len(np.unique(y)) < 2:
+        raise ValueError(f"Partisi row group {row_groups} hanya memuat satu kelas churn; perbesar chunk_rows")
+    X = preprocessor.transform(model_features(train))
+    classifier = build_pipeline(n_estimators=n_trees, random_state=random_state).named_steps['classifier']
+    with threadpool_limits(limits=1):
+        classifier.fit(X, y)
+    return classifier
+
+# Fungsi untuk menggabungkan pohon dari beberapa partisi menjadi satu RandomForestClassifier.
+# Prediksi random forest adalah rata-rata probabilitas semua pohon, jadi hutan gabungan sama
+# dengan hutan yang pohonnya dilatih pada partisi berbeda.
+def merge_forests(forests):
+    merged = forests[0]
+    for forest in forests[1:]:
+        if not np.array_equal(forest.classes_, merged.classes_):
+            raise ValueError("Kelas target berbeda antar partisi")
+        merged.estimators_ = merged.estimators_ + forest.estimators_
+    merged.set_params(n_estimators=len(merged.estimators_), n_jobs=None)
+    return merged
+
+# Fungsi untuk mengevaluasi model pada baris test, satu row group sekaligus
+def evaluate_test_rows(model, path=PARQUET_PATH, seed=42):
+    parquet_file = open_parquet(path)
+    histogram = ScoreHistogram()
+    for i in range(parquet_file.metadata.num_row_groups):
+        df, mask = read_split(parquet_file, i, seed)
+        test = df[mask]
+        if len(test):
+            histogram.update(churn_labels(test), model.predict_proba(model_features(test))[:, 1])
+    return histogram
+
+# Fungsi untuk melatih model dari dataset yang lebih besar dari RAM. Dataset dibaca per partisi
+# (maksimal chunk_rows baris), setiap partisi melatih sebagian pohon di proses pool, lalu semua
+# pohon digabung menjadi satu Pipeline yang sama formatnya dengan hasil train_churn_model.
+def train_churn_model_chunked(path=PARQUET_PATH, chunk_rows=DEFAULT_CHUNK_ROWS, n_estimators=100,
+                              cpu_budget=None, seed=42, build_score_table=True, progress=None):
+    os.makedirs('models', exist_ok=True)
+    ensure_store(path)
+
+    n_jobs = resolve_cpu_budget(cpu_budget)
+    timings = {}
+    report_progress(progress, 0.0, "Fitting preprocessor")
+
+    print("Fitting preprocessor (streaming pass)...")
+    with timed_phase(timings, 'load'):
+        preprocessor, summary, reservoir, n_train = fit_preprocessor(path, seed)
+    print(f"Scanned {summary.count} rows (churn rate {summary.churn_rate:.2%})")
+
+    partitions = plan_partitions(path, chunk_rows)
+    trees = allocate_trees(n_estimators, [n_rows for _, n_rows in partitions])
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(partitions))]
+    print(f"Training {sum(trees)} trees on {len(partitions)} partition(s) using {n_jobs} worker(s)...")
+
+    report_progress(progress, 0.1, "Training model")
+    args = [(path, row_groups, n, s, preprocessor, seed)
+            for (row_groups, _), n, s in zip(partitions, trees, seeds)]
+    with timed_phase(timings, 'fit'):
+        if n_jobs == 1 or len(partitions) == 1:
+            forests = [fit_partition(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(partitions))) as executor:
+                forests = list(executor.map(fit_partition, *zip(*args)))
+        model = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', merge_forests(forests))])
+
+    report_progress(progress, 0.7, "Evaluating model")
+    print("Evaluating model...")
+    with timed_phase(timings, 'evaluate'):
+        evaluation = evaluate_test_rows(compile_model(model), path, seed)
+    roc_auc = evaluation.auc()
+    print_evaluation(evaluation)
+
+    report_progress(progress, 0.8, "Saving model")
+    version = save_trained_model(model, build_score_table=build_score_table, n_jobs=n_jobs, timings=timings,
+                                 info={'source': 'chunked_training', 'roc_auc': roc_auc, 'rows_seen': summary.count})
+    save_reservoir(reservoir)
+
+    print_phase_timings(timings)
+
+    write_training_report({
+        'model_hash': version['content_hash'],
+        'model_version': version['version'],
+        'cpu_budget': n_jobs,
+        'n_estimators': len(model.named_steps['classifier'].estimators_),
+        'rows_seen': summary.count,
+        'n_train': n_train,
+        'n_test': evaluation.n_positive + evaluation.n_negative,
+        'chunk_rows': chunk_rows,
+        'n_partitions': len(partitions),
+        'roc_auc': roc_auc,
+        'data_summary': summary.to_dict(),
+        'timings': timings,
+    })
+
+    report_progress(progress, 1.0, "Done")
+    print("Model training completed and saved to models/churn_model.pkl")
+    return model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latih model churn per partisi data (out-of-core)")
+    parser.add_argument('--data-path', default=PARQUET_PATH)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="Jumlah baris maksimal per partisi (batas memori per worker)")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--cpu-budget', type=int, default=None,
+                        help="Jumlah proses worker (default: semua core kecuali satu)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-score-table', action='store_true',
+                        help="Lewati pembuatan tabel skor precomputed")
+    args = parser.parse_args()
+
+    train_churn_model_chunked(args.data_path, args.chunk_rows, args.n_estimators, args.cpu_budget,
+                              args.seed, build_score_table=not args.no_score_table)
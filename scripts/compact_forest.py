@@ -0,0 +1,89 @@
+import argparse
+
+import numpy as np
+
+from scripts.compiled_model import compact_model
+from scripts.data_store import PARQUET_PATH, iter_customer_data
+from scripts.model_artifact import artifact_nbytes
+from scripts.model_registry import (
+    REGISTRY_DIR, RegistryError, current_version, load_version, publish_model, read_version_info,
+)
+from scripts.score_table import ScoreTable
+from scripts.scoring import FEATURE_COLUMNS
+
+# Selisih probabilitas maksimal yang diizinkan antara model ringkas dan model asli, di luar
+# merge_tolerance (pembulatan daun float32 sekitar 1e-8)
+DEFAULT_TOLERANCE = 1e-6
+
+# Jumlah baris data yang dipakai untuk verifikasi
+VERIFY_ROWS = 100000
+
+# Fungsi untuk menghitung selisih probabilitas churn terbesar antara dua model
+def max_probability_deviation(original, compact, features):
+    return float(np.max(np.abs(original.predict_proba(features)[:, 1] - compact.predict_proba(features)[:, 1])))
+
+# Fungsi untuk membuat versi ringkas dari versi model di registry (default: versi aktif),
+# memverifikasi probabilitasnya terhadap model asli pada data pelanggan, lalu menyimpannya sebagai
+# versi baru. Jika selisih melebihi tolerance, tidak ada versi yang disimpan.
+def export_compact_model(version=None, registry_dir=REGISTRY_DIR, data_path=PARQUET_PATH,
+                         merge_tolerance=0.0, tolerance=None, verify_rows=VERIFY_ROWS, leaf_dtype=np.float32,
+                         activate=True):
+    if tolerance is None:
+        tolerance = merge_tolerance + DEFAULT_TOLERANCE
+    version = version or current_version(registry_dir)
+    if version is None:
+        raise RegistryError(f"Belum ada versi model aktif di {registry_dir}")
+
+    original = load_version(version, registry_dir)
+    compact = compact_model(original, leaf_dtype, merge_tolerance)
+    features = next(iter_customer_data(columns=FEATURE_COLUMNS, batch_size=verify_rows, path=data_path))
+    deviation = max_probability_deviation(original, compact, features)
+
+    report = {
+        'compacted_from': version,
+        'nodes_before': int(len(original.children)),
+        'nodes_after': int(len(compact.children)),
+        'max_depth_before': original.max_depth,
+        'max_depth_after': compact.max_depth,
+        'bytes_before': artifact_nbytes(original),
+        'bytes_after': artifact_nbytes(compact),
+        'leaf_dtype': np.dtype(leaf_dtype).name,
+        'merge_tolerance': merge_tolerance,
+        'max_deviation': deviation,
+        'verified_rows': len(features),
+    }
+    print(f"Nodes: {report['nodes_before']} -> {report['nodes_after']}, "
+          f"max depth: {report['max_depth_before']} -> {report['max_depth_after']}")
+    print(f"Size: {report['bytes_before'] / 1e6:.2f} MB -> {report['bytes_after'] / 1e6:.2f} MB "
+          f"({report['bytes_before'] / report['bytes_after']:.1f}x smaller)")
+    print(f"Max probability deviation on {len(features)} rows: {deviation:.2e}")
+    if deviation > tolerance:
+        raise ValueError(f"Selisih probabilitas {deviation:.2e} melebihi tolerance {tolerance:.2e}; model tidak disimpan")
+
+    info = {
+        name: value for name, value in read_version_info(version, registry_dir).items()
+        if name not in ('version', 'content_hash', 'created_at', 'compaction')
+    }
+    info['compaction'] = report
+    published = publish_model(compact, ScoreTable.build(compact), info=info, registry_dir=registry_dir,
+                              activate=activate)
+    print(f"Compact model version {published['version']} saved to {registry_dir} "
+          f"(hash {published['content_hash'][:12]})")
+    return published
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ekspor versi model ringkas (indeks kecil, daun float32, subtree dilebur)")
+    parser.add_argument('--version', default=None, help="Versi sumber (default: versi aktif)")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    parser.add_argument('--data-path', default=PARQUET_PATH)
+    parser.add_argument('--merge-tolerance', type=float, default=0.0,
+                        help="Lebur subtree jika selisih probabilitas daunnya paling besar nilai ini")
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help="Selisih probabilitas maksimal saat verifikasi (default: merge tolerance + 1e-6)")
+    parser.add_argument('--verify-rows', type=int, default=VERIFY_ROWS)
+    parser.add_argument('--leaf-dtype', choices=['float32', 'float64'], default='float32')
+    parser.add_argument('--no-activate', action='store_true', help="Simpan versi tanpa mengaktifkannya")
+    args = parser.parse_args()
+
+    export_compact_model(args.version, args.registry_dir, args.data_path, args.merge_tolerance, args.tolerance,
+                         args.verify_rows, np.dtype(args.leaf_dtype).type, activate=not args.no_activate)
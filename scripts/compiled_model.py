@@ -0,0 +1,331 @@
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+from scripts.metrics import timer
+
+# Jumlah baris yang ditelusuri sekaligus, agar tabel node sementara tetap muat di cache
+ROW_BLOCK_SIZE = 2048
+
+# Interval (dalam level pohon) untuk membuang pasangan (pohon, baris) yang sudah mencapai daun
+COMPACT_EVERY = 4
+
+# Fungsi untuk mengecek DataFrame tanpa mengimpor pandas: jika pandas belum diimpor,
+# input pasti bukan DataFrame (jalur prediksi dict/array tidak perlu memuat pandas)
+def is_dataframe(data):
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+# Fungsi untuk membulatkan threshold float64 ke bawah menjadi float32.
+# Sklearn membandingkan fitur float32 dengan threshold float64; untuk x float32,
+# `x > t` setara dengan `x > floor32(t)`, jadi hasil traversal tetap identik.
+def _float32_floor(values):
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+# Fungsi untuk menyimpan indeks sebagai int32, kecuali sudah memakai tipe yang lebih kecil
+def _index_array(values):
+    values = np.asarray(values)
+    if values.dtype in (np.int8, np.int16, np.int32):
+        return values
+    return values.astype(np.int32)
+
+# Model hasil "kompilasi" Pipeline (ColumnTransformer + RandomForestClassifier).
+# Preprocessing dilipat menjadi operasi numerik biasa dan seluruh pohon diratakan
+# menjadi tabel node NumPy yang bersebelahan, sehingga inference tidak memakai pandas
+# maupun dispatch Python per pohon. Probabilitas yang dihasilkan identik dengan model asli;
+# input numerik kosong atau tidak finite ditolak dengan ValueError.
+class CompiledChurnModel:
+    def __init__(self, numeric_features, mean, scale, categorical_feature, categories,
+                 encoded_categories, feature, threshold, children, leaf_value, roots, max_depth,
+                 classes, feature_names, feature_importances):
+        self.numeric_features = list(numeric_features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categorical_feature = categorical_feature
+        # `categories` adalah semua kategori yang dikenal encoder,
+        # `encoded_categories` hanya kategori yang menjadi kolom (setelah drop)
+        self.categories = list(categories)
+        self.encoded_categories = list(encoded_categories)
+
+        # Tabel node: satu baris per node dari semua pohon (indeks global). Model ringkas
+        # (compact_model) memakai indeks int8/int16 dan satu probabilitas float32 per node.
+        self.feature = _index_array(feature)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.children = _index_array(children)
+        self.leaf_value = np.asarray(leaf_value)
+        if self.leaf_value.dtype not in (np.float32, np.float64):
+            self.leaf_value = self.leaf_value.astype(np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self._is_leaf = self.children[:, 0] == np.arange(len(self.children))
+
+        self.classes_ = np.asarray(classes)
+        self.feature_names = list(feature_names)
+        self.feature_importances_ = np.asarray(feature_importances, dtype=np.float64)
+
+        # Diisi saat model disimpan/dimuat sebagai artifact (lihat model_artifact.py)
+        self.content_hash = None
+        self.artifact_path = None
+        # Diisi saat model dimuat dari registry (lihat model_registry.py)
+        self.registry_version = None
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def feature_columns(self):
+        return self.numeric_features[:1] + [self.categorical_feature] + self.numeric_features[1:]
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        preprocessor = pipeline.named_steps['preprocessor']
+        forest = pipeline.named_steps['classifier']
+
+        numeric_features, scaler = None, None
+        categorical_feature, encoder = None, None
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'num':
+                numeric_features, scaler = list(columns), transformer
+            elif name == 'cat':
+                if len(columns) != 1:
+                    raise ValueError("Hanya mendukung satu fitur kategorikal")
+                categorical_feature, encoder = columns[0], transformer
+            elif transformer != 'drop':
+                raise ValueError(f"Transformer '{name}' tidak didukung oleh CompiledChurnModel")
+
+        if scaler is None or encoder is None:
+            raise ValueError("Pipeline harus memiliki transformer 'num' dan 'cat'")
+
+        n_numeric = len(numeric_features)
+        mean = scaler.mean_ if scaler.mean_ is not None and scaler.with_mean else np.zeros(n_numeric)
+        scale = scaler.scale_ if scaler.scale_ is not None and scaler.with_std else np.ones(n_numeric)
+
+        # Kategori yang tetap menjadi kolom setelah OneHotEncoder(drop=...)
+        categories = list(encoder.categories_[0])
+        drop_idx = encoder.drop_idx_[0] if encoder.drop_idx_ is not None else None
+        encoded_categories = [c for i, c in enumerate(categories) if i != drop_idx]
+
+        feature_names = list(numeric_features) + [f"{categorical_feature}_{c}" for c in encoded_categories]
+
+        features, thresholds, children, leaf_values, roots = [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int64)
+
+            # Node daun menunjuk ke dirinya sendiri sehingga traversal berhenti di sana
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+
+            # Normalisasi nilai daun sama seperti DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :len(forest.classes_)].copy()
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value /= normalizer
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, _float32_floor(tree.threshold)))
+            children.append(np.column_stack([left, right]))
+            leaf_values.append(value)
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            numeric_features=numeric_features,
+            mean=mean,
+            scale=scale,
+            categorical_feature=categorical_feature,
+            categories=categories,
+            encoded_categories=encoded_categories,
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            leaf_value=np.concatenate(leaf_values),
+            roots=np.asarray(roots),
+            max_depth=max_depth,
+            classes=forest.classes_,
+            feature_names=feature_names,
+            feature_importances=forest.feature_importances_,
+        )
+
+    # Fungsi untuk mengubah input mentah menjadi matriks fitur float32 (tanpa pandas).
+    # Urutan operasi sama seperti StandardScaler + OneHotEncoder lalu konversi float32 di pohon.
+    def transform(self, data):
+        if is_dataframe(data):
+            columns = {col: data[col].to_numpy() for col in self.feature_columns}
+        elif isinstance(data, Mapping):
+            columns = {col: np.atleast_1d(data[col]) for col in self.feature_columns}
+        else:
+            raise TypeError(f"Data input harus berupa DataFrame atau dict, bukan {type(data).__name__}")
+
+        # Seperti check_array di StandardScaler: kolom numerik digabung ke float32 jika dtype
+        # gabungannya float32 (misalnya data Parquet bertipe int8/float32/int16), selain itu float64,
+        # lalu scaling dihitung in-place di dtype itu agar pembulatannya sama persis
+        numeric_columns = [np.asarray(columns[col]) for col in self.numeric_features]
+        dtype = np.float32 if np.result_type(*numeric_columns) == np.float32 else np.float64
+        numeric = np.column_stack([values.astype(dtype) for values in numeric_columns])
+        # Pohon sklearn punya aturan sendiri untuk nilai kosong (missing_go_to_left) yang tidak ada
+        # di tabel node, jadi NaN/inf ditolak agar hasil tidak pernah berbeda dari model asli
+        finite = np.isfinite(numeric).all(axis=0)
+        if not finite.all():
+            columns = [col for col, ok in zip(self.numeric_features, finite) if not ok]
+            raise ValueError(f"Nilai kosong atau tidak finite (NaN/inf) pada kolom: {columns}")
+        numeric -= self.mean
+        numeric /= self.scale
+
+        category_values = np.asarray(columns[self.categorical_feature])
+        if category_values.dtype.kind not in 'OUS' or len(category_values) == 0:
+            category_values = category_values.astype(object)
+        unknown = ~np.isin(category_values, self.categories)
+        if unknown.any():
+            raise ValueError(
+                f"Kategori tidak dikenal pada kolom '{self.categorical_feature}': "
+                f"{sorted(set(category_values[unknown].tolist()))}"
+            )
+        encoded = np.column_stack(
+            [(category_values == c).astype(np.float64) for c in self.encoded_categories]
+        ) if self.encoded_categories else np.empty((len(numeric), 0))
+
+        return np.hstack([numeric, encoded]).astype(np.float32)
+
+    # Fungsi untuk menelusuri semua pohon untuk satu blok baris secara vectorized.
+    # Pasangan (pohon, baris) yang sudah sampai di daun dikeluarkan dari himpunan aktif
+    # setiap COMPACT_EVERY level, sehingga pekerjaan mengikuti kedalaman jalur sebenarnya.
+    def _leaf_nodes(self, X):
+        n_rows, n_features = X.shape
+        X_flat = np.ascontiguousarray(X).ravel()
+        children_flat = self.children.ravel()
+
+        leaves = np.repeat(self.roots, n_rows)
+        active = np.arange(len(leaves))
+        node = leaves.copy()
+        row_offset = np.tile(np.arange(n_rows, dtype=np.int32) * n_features, self.n_estimators)
+
+        for depth in range(1, self.max_depth + 1):
+            go_right = X_flat.take(row_offset + self.feature.take(node)) > self.threshold.take(node)
+            # Dikalikan dalam int32 agar indeks int16 tidak overflow
+            node = children_flat.take(np.multiply(node, 2, dtype=np.int32) + go_right)
+
+            if depth % COMPACT_EVERY == 0 and depth < self.max_depth:
+                done = self._is_leaf.take(node)
+                leaves[active[done]] = node[done]
+                pending = ~done
+                active, node, row_offset = active[pending], node[pending], row_offset[pending]
+                if len(active) == 0:
+                    break
+
+        leaves[active] = node
+        return leaves.reshape(self.n_estimators, n_rows)
+
+    # Fungsi untuk menghitung probabilitas dari matriks fitur hasil transform
+    def predict_proba_transformed(self, X):
+        n_rows = X.shape[0]
+        proba = np.empty((n_rows, len(self.classes_)), dtype=np.float64)
+        for start in range(0, n_rows, ROW_BLOCK_SIZE):
+            block = X[start:start + ROW_BLOCK_SIZE]
+            values = self.leaf_value[self._leaf_nodes(block)]
+            if self.leaf_value.ndim == 1:
+                # Model ringkas: hanya probabilitas kelas positif yang disimpan
+                positive = np.cumsum(values, axis=0, dtype=np.float64)[-1] / self.n_estimators
+                proba[start:start + len(block), 0] = 1.0 - positive
+                proba[start:start + len(block), 1] = positive
+                continue
+            # Jumlahkan per pohon secara berurutan (cumsum) agar pembulatan identik dengan sklearn
+            proba[start:start + len(block)] = np.cumsum(values, axis=0)[-1] / self.n_estimators
+        return proba
+
+    def predict_proba(self, data):
+        with timer('transform', component='compiled_model'):
+            X = self.transform(data)
+        with timer('predict', component='compiled_model'):
+            return self.predict_proba_transformed(X)
+
+    def predict(self, data):
+        return self.classes_[np.argmax(self.predict_proba(data), axis=1)]
+
+
+# Fungsi untuk mengompilasi Pipeline hasil train_churn_model
+def compile_model(pipeline):
+    return CompiledChurnModel.from_pipeline(pipeline)
+
+# Fungsi untuk membuat versi ringkas model terkompilasi (klasifikasi biner):
+# - setiap node hanya menyimpan probabilitas kelas positif (leaf_dtype, default float32);
+# - node internal yang kedua anaknya daun dilebur menjadi daun jika selisih nilai daun di seluruh
+#   subtree-nya paling besar merge_tolerance (default 0: hanya daun yang nilainya sama), berulang
+#   dari bawah ke atas, lalu node yang tidak lagi terjangkau dibuang;
+# - indeks fitur memakai int8 dan indeks node int16 jika jumlah node muat, selain itu int32.
+# Node yang dilebur memakai nilainya sendiri (proporsi kelas data training di node itu), yang selalu
+# berada di antara nilai daun yang digantikannya, sehingga probabilitas setiap baris bergeser paling
+# banyak merge_tolerance ditambah pembulatan leaf_dtype. Lihat compact_forest.py untuk verifikasi.
+def compact_model(model, leaf_dtype=np.float32, merge_tolerance=0.0):
+    if len(model.classes_) != 2:
+        raise ValueError("compact_model hanya mendukung klasifikasi biner")
+    if model.leaf_value.ndim == 1:
+        return model
+
+    n_nodes = len(model.children)
+    node_ids = np.arange(n_nodes)
+    children = np.array(model.children, dtype=np.int64)
+    positive = np.asarray(model.leaf_value[:, 1], dtype=leaf_dtype).copy()
+    is_leaf = children[:, 0] == node_ids
+
+    # Rentang nilai daun asli di subtree setiap node yang sudah dilebur
+    low, high = positive.copy(), positive.copy()
+    while True:
+        left, right = children[:, 0], children[:, 1]
+        merged_low = np.minimum(low[left], low[right])
+        merged_high = np.maximum(high[left], high[right])
+        mergeable = ~is_leaf & is_leaf[left] & is_leaf[right] & (merged_high - merged_low <= merge_tolerance)
+        if not mergeable.any():
+            break
+        low[mergeable], high[mergeable] = merged_low[mergeable], merged_high[mergeable]
+        positive[mergeable] = np.clip(positive[mergeable], low[mergeable], high[mergeable])
+        children[mergeable] = node_ids[mergeable, np.newaxis]
+        is_leaf |= mergeable
+
+    # Node yang masih terjangkau dari akar, per level (sekaligus menghitung kedalaman baru)
+    reachable = np.zeros(n_nodes, dtype=bool)
+    frontier = np.asarray(model.roots, dtype=np.int64)
+    max_depth = 0
+    while len(frontier):
+        reachable[frontier] = True
+        frontier = children[frontier[~is_leaf[frontier]]].ravel()
+        if len(frontier):
+            max_depth += 1
+
+    keep = np.flatnonzero(reachable)
+    new_index = np.full(n_nodes, -1, dtype=np.int64)
+    new_index[keep] = np.arange(len(keep))
+    index_dtype = np.int16 if len(keep) <= np.iinfo(np.int16).max else np.int32
+    feature_dtype = np.int8 if len(model.feature_names) <= np.iinfo(np.int8).max else np.int32
+    feature = np.where(is_leaf[keep], 0, model.feature[keep])
+    threshold = np.where(is_leaf[keep], np.inf, model.threshold[keep])
+
+    compact = CompiledChurnModel(
+        numeric_features=model.numeric_features,
+        mean=model.mean,
+        scale=model.scale,
+        categorical_feature=model.categorical_feature,
+        categories=model.categories,
+        encoded_categories=model.encoded_categories,
+        feature=feature.astype(feature_dtype),
+        threshold=threshold.astype(np.float32),
+        children=new_index[children[keep]].astype(index_dtype),
+        leaf_value=positive[keep],
+        roots=new_index[np.asarray(model.roots)],
+        max_depth=max_depth,
+        classes=model.classes_,
+        feature_names=model.feature_names,
+        feature_importances=model.feature_importances_,
+    )
+    return compact
@@ -0,0 +1,215 @@
+import hashlib
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+PARQUET_PATH = 'data/customer_data.parquet'
+CSV_PATH = 'data/customer_data.csv'
+
+# Jumlah baris per row group; pembaca bisa melewati row group yang tidak dibutuhkan
+ROW_GROUP_SIZE = 100000
+
+# Skema kolom data pelanggan yang disimpan di Parquet
+SCHEMA = pa.schema([
+    ('age', pa.int16()),
+    ('gender', pa.string()),
+    ('purchase_amount', pa.float64()),
+    ('tenure', pa.int16()),
+    ('churn', pa.int8()),
+])
+
+# Tipe kolom di memori (DataFrame hasil loader): age int8, tenure int16, purchase_amount float32,
+# gender categorical, churn bool. Sekitar 9 byte per baris, dibanding ~40 byte ditambah objek
+# string dengan tipe default pandas. File Parquet tetap memakai SCHEMA di atas.
+MEMORY_SCHEMA = pa.schema([
+    ('age', pa.int8()),
+    ('gender', pa.dictionary(pa.int32(), pa.string())),
+    ('purchase_amount', pa.float32()),
+    ('tenure', pa.int16()),
+    ('churn', pa.bool_()),
+])
+
+# Urutan kategori gender tetap, sehingga kode categorical sama di semua chunk dan row group
+GENDER_CATEGORIES = ['Female', 'Male']
+
+# Kolom yang dibaca langsung sebagai dictionary dari Parquet (tanpa decode ke string)
+READ_DICTIONARY = ['gender']
+
+# File CSV lama yang berpasangan dengan sebuah file Parquet (nama sama, ekstensi .csv)
+def csv_path_for(path):
+    return os.path.splitext(path)[0] + '.csv'
+
+# Fungsi untuk mengecek apakah data pelanggan sudah tersedia (Parquet atau CSV lama)
+def data_available(path=PARQUET_PATH):
+    return os.path.exists(path) or os.path.exists(csv_path_for(path))
+
+# Fungsi untuk mengonversi CSV ke Parquet secara streaming (tanpa memuat seluruh CSV ke memori)
+def migrate_csv(csv_path=CSV_PATH, path=PARQUET_PATH, row_group_size=ROW_GROUP_SIZE):
+    convert_options = pa_csv.ConvertOptions(column_types={field.name: field.type for field in SCHEMA})
+    reader = pa_csv.open_csv(csv_path, convert_options=convert_options)
+    with CustomerDataWriter(path, row_group_size=row_group_size) as writer:
+        for batch in reader:
+            writer.write_table(pa.Table.from_batches([batch]))
+    print(f"Migrated {csv_path} to {path}")
+
+# Fungsi untuk memastikan store Parquet tersedia dan terbaru.
+# CSV yang lebih baru dari file Parquet (misalnya ada baris baru yang ditambahkan) dimigrasikan ulang.
+def ensure_store(path=PARQUET_PATH):
+    csv_path = csv_path_for(path)
+    csv_exists = os.path.exists(csv_path)
+    if os.path.exists(path):
+        if csv_exists and os.path.getmtime(csv_path) > os.path.getmtime(path):
+            migrate_csv(csv_path, path)
+        return path
+    if csv_exists:
+        migrate_csv(csv_path, path)
+        return path
+    raise FileNotFoundError(f"Data pelanggan tidak ditemukan: {path} atau {csv_path}")
+
+# Fungsi untuk mengubah tabel Arrow menjadi DataFrame bertipe ringkas (MEMORY_SCHEMA).
+# Konversi tipe dilakukan di Arrow sebelum to_pandas, sehingga tidak ada salinan DataFrame
+# tambahan; cast gagal (ArrowInvalid) jika nilai tidak muat, misalnya usia di atas 127.
+def to_frame(table):
+    table = table.cast(pa.schema([MEMORY_SCHEMA.field(name) for name in table.column_names]))
+    df = table.to_pandas()
+    if 'gender' in df:
+        extra = sorted(set(df['gender'].cat.categories) - set(GENDER_CATEGORIES))
+        df['gender'] = df['gender'].cat.set_categories(GENDER_CATEGORIES + extra)
+    return df
+
+# Label churn sebagai array int8 (view dari kolom bool, tanpa salinan) untuk training dan metrik
+def churn_labels(df):
+    return df['churn'].to_numpy().view(np.int8)
+
+# Fungsi untuk menyiapkan fitur input Pipeline dari DataFrame ringkas. purchase_amount dinaikkan
+# ke float64 agar StandardScaler menghitung dalam float64, sama seperti CompiledChurnModel.transform.
+def model_features(df):
+    features = df.drop(columns='churn', errors='ignore')
+    features['purchase_amount'] = features['purchase_amount'].astype(np.float64)
+    return features
+
+# Fungsi untuk membuka file Parquet; hasil read_row_group(s) diteruskan ke to_frame
+def open_parquet(path=PARQUET_PATH):
+    return pq.ParquetFile(path, read_dictionary=READ_DICTIONARY)
+
+# Fungsi utama untuk membaca data pelanggan. Hanya kolom (`columns`) dan row group
+# (`row_groups`) yang diminta yang dibaca; `filters` diteruskan ke pyarrow untuk
+# predicate pushdown, misalnya [('churn', '==', 1)].
+def load_customer_data(columns=None, row_groups=None, filters=None, path=PARQUET_PATH):
+    ensure_store(path)
+    if row_groups is not None:
+        table = open_parquet(path).read_row_groups(row_groups, columns=columns)
+    else:
+        table = pq.read_table(path, columns=columns, filters=filters, read_dictionary=READ_DICTIONARY)
+    return to_frame(table)
+
+# Fungsi untuk membaca data per chunk (DataFrame) dengan memori terbatas
+def iter_customer_data(columns=None, batch_size=ROW_GROUP_SIZE, path=PARQUET_PATH):
+    ensure_store(path)
+    parquet_file = open_parquet(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield to_frame(pa.Table.from_batches([batch]))
+
+# Fungsi untuk membaca baris setelah posisi `offset` saja; row group sebelum offset dilewati
+def load_rows_after(offset, columns=None, path=PARQUET_PATH):
+    ensure_store(path)
+    parquet_file = open_parquet(path)
+    metadata = parquet_file.metadata
+
+    row_groups = []
+    skip = offset
+    start = 0
+    for i in range(metadata.num_row_groups):
+        n_rows = metadata.row_group(i).num_rows
+        if start + n_rows > offset:
+            row_groups.append(i)
+        else:
+            skip -= n_rows
+        start += n_rows
+
+    if not row_groups:
+        return to_frame(SCHEMA.empty_table().select(columns or SCHEMA.names))
+    table = parquet_file.read_row_groups(row_groups, columns=columns)
+    return to_frame(table.slice(skip))
+
+# Fungsi untuk membaca ringkasan (jumlah baris dan kolom) dari metadata Parquet tanpa membaca data
+def data_shape(path=PARQUET_PATH):
+    ensure_store(path)
+    metadata = pq.ParquetFile(path).metadata
+    return metadata.num_rows, metadata.num_columns
+
+# Fingerprint row group terakhir per file, dipakai ulang selama file tidak berubah (mtime dan ukuran sama)
+_fingerprint_memo = {}
+
+# Fungsi untuk menghitung fingerprint tiap row group dari byte terkompresi di file Parquet.
+# Tidak perlu decode data: row group yang isinya sama selalu menghasilkan hash yang sama.
+def row_group_fingerprints(path=PARQUET_PATH):
+    ensure_store(path)
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key in _fingerprint_memo:
+        return list(_fingerprint_memo[key])
+
+    metadata = pq.ParquetFile(path).metadata
+    fingerprints = []
+    with open(path, 'rb') as f:
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            digest = hashlib.sha256()
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                start = column.data_page_offset
+                if column.has_dictionary_page and column.dictionary_page_offset:
+                    start = min(start, column.dictionary_page_offset)
+                f.seek(start)
+                digest.update(f.read(column.total_compressed_size))
+            fingerprints.append(digest.hexdigest())
+
+    for stale in [k for k in _fingerprint_memo if k[0] == key[0]]:
+        del _fingerprint_memo[stale]
+    _fingerprint_memo[key] = fingerprints
+    return list(fingerprints)
+
+# Fingerprint seluruh dataset dari fingerprint row group-nya
+def dataset_fingerprint(fingerprints):
+    return hashlib.sha256(''.join(fingerprints).encode('utf-8')).hexdigest()
+
+# Penulis data pelanggan per chunk ke Parquet. File ditulis ke path sementara dan
+# di-rename saat selesai, sehingga pembaca tidak pernah melihat file setengah jadi.
+class CustomerDataWriter:
+    def __init__(self, path=PARQUET_PATH, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.tmp_path = f"{path}.tmp-{os.getpid()}"
+        self.rows_written = 0
+        self._writer = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._writer = pq.ParquetWriter(self.tmp_path, SCHEMA)
+        return self
+
+    def write_table(self, table):
+        table = table.select(SCHEMA.names).cast(SCHEMA)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += table.num_rows
+
+    def write(self, df):
+        self.write_table(pa.Table.from_pandas(df, preserve_index=False))
+
+    def __exit__(self, exc_type, exc, tb):
+        self._writer.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return False
+
+# Fungsi untuk menulis seluruh DataFrame ke store Parquet
+def write_customer_data(df, path=PARQUET_PATH, row_group_size=ROW_GROUP_SIZE):
+    with CustomerDataWriter(path, row_group_size=row_group_size) as writer:
+        writer.write(df)
+    return path
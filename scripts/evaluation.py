@@ -0,0 +1,183 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scripts.data_store import PARQUET_PATH, churn_labels, open_parquet, to_frame
+from scripts.scoring import FEATURE_COLUMNS
+
+# Jumlah bin histogram skor di [0, 1]. AUC dari histogram menganggap skor di bin yang sama seri,
+# jadi selisihnya dari AUC exact paling besar auc_error_bound(). Selisih itu nol hanya jika setiap
+# bin berisi satu nilai skor, misalnya hutan pohon penuh dengan daun murni (probabilitas kelipatan
+# 1/n_estimators); pohon dengan batas kedalaman punya daun tidak murni sehingga AUC-nya mendekati.
+DEFAULT_BINS = 10000
+
+# Histogram skor per kelas (0 = tidak churn, 1 = churn) dengan resolusi tetap. Ukurannya tidak
+# bergantung pada jumlah baris, bisa diisi per chunk, dan dua histogram bisa digabung (merge),
+# sehingga evaluasi bisa dilakukan pada data yang lebih besar dari RAM dan di beberapa worker.
+# Skor s masuk ke bin floor(s * n_bins); prediksi positif berarti s >= threshold, sama seperti
+# predict_churn_batch.
+class ScoreHistogram:
+    def __init__(self, n_bins=DEFAULT_BINS):
+        self.n_bins = n_bins
+        self.counts = np.zeros((2, n_bins), dtype=np.int64)
+
+    def _bin(self, scores):
+        return np.clip((np.asarray(scores, dtype=np.float64) * self.n_bins).astype(np.int64), 0, self.n_bins - 1)
+
+    def update(self, y_true, y_score):
+        y_true = np.asarray(y_true).astype(bool)
+        bins = self._bin(y_score)
+        self.counts[0] += np.bincount(bins[~y_true], minlength=self.n_bins)
+        self.counts[1] += np.bincount(bins[y_true], minlength=self.n_bins)
+        return self
+
+    def merge(self, other):
+        if other.n_bins != self.n_bins:
+            raise ValueError("Histogram dengan jumlah bin berbeda tidak bisa digabung")
+        self.counts += other.counts
+        return self
+
+    @property
+    def n_negative(self):
+        return int(self.counts[0].sum())
+
+    @property
+    def n_positive(self):
+        return int(self.counts[1].sum())
+
+    def _descending(self):
+        return self.counts[0, ::-1], self.counts[1, ::-1]
+
+    # Kurva ROC dengan satu titik per bin yang tidak kosong (threshold = batas bawah bin),
+    # format sama seperti sklearn.metrics.roc_curve
+    def roc_curve(self):
+        negatives, positives = self._descending()
+        occupied = (negatives + positives) > 0
+        fps = np.cumsum(negatives)[occupied]
+        tps = np.cumsum(positives)[occupied]
+        lower_edges = (np.arange(self.n_bins)[::-1][occupied]) / self.n_bins
+        fpr = np.concatenate([[0.0], fps / max(self.n_negative, 1)])
+        tpr = np.concatenate([[0.0], tps / max(self.n_positive, 1)])
+        thresholds = np.concatenate([[np.inf], lower_edges])
+        return fpr, tpr, thresholds
+
+    # AUC dari histogram: pasangan (positif, negatif) di bin yang sama dihitung setengah,
+    # sama seperti skor yang seri pada AUC exact
+    def auc(self):
+        negatives, positives = self._descending()
+        positives_above = np.cumsum(positives) - positives
+        pairs = self.n_positive * self.n_negative
+        if pairs == 0:
+            return float('nan')
+        return float(np.sum(negatives * (positives_above + positives / 2)) / pairs)
+
+    # Batas atas error AUC: urutan skor di dalam satu bin tidak diketahui, jadi pasangan di bin
+    # yang sama bisa bergeser paling banyak setengah. Error sebenarnya nol jika setiap bin hanya
+    # berisi satu nilai skor (misalnya probabilitas random forest), tetapi batas ini tetap konservatif.
+    def auc_error_bound(self):
+        pairs = self.n_positive * self.n_negative
+        if pairs == 0:
+            return float('nan')
+        return float(np.sum(self.counts[0] * self.counts[1]) / 2 / pairs)
+
+    # Confusion matrix [[TN, FP], [FN, TP]] untuk prediksi positif jika skor >= threshold.
+    # Exact jika threshold tepat di batas bin (misalnya 0.5); selain itu baris di bin yang memuat
+    # threshold dihitung positif.
+    def confusion_matrix(self, threshold=0.5):
+        cut = int(np.clip(np.floor(threshold * self.n_bins), 0, self.n_bins))
+        tn, fp = int(self.counts[0, :cut].sum()), int(self.counts[0, cut:].sum())
+        fn, tp = int(self.counts[1, :cut].sum()), int(self.counts[1, cut:].sum())
+        return np.array([[tn, fp], [fn, tp]])
+
+    # Precision, recall, f1, dan support per kelas serta rata-ratanya, seperti
+    # sklearn.metrics.classification_report(output_dict=True)
+    def classification_metrics(self, threshold=0.5):
+        matrix = self.confusion_matrix(threshold)
+        total = matrix.sum()
+        report = {}
+        for label in (0, 1):
+            true_positive = matrix[label, label]
+            predicted = matrix[:, label].sum()
+            support = matrix[label].sum()
+            precision = true_positive / predicted if predicted else 0.0
+            recall = true_positive / support if support else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            report[str(label)] = {'precision': precision, 'recall': recall, 'f1-score': f1, 'support': int(support)}
+
+        report['accuracy'] = (matrix[0, 0] + matrix[1, 1]) / total if total else 0.0
+        for average, weights in (('macro avg', [1, 1]), ('weighted avg', [report['0']['support'], report['1']['support']])):
+            weights = np.asarray(weights, dtype=np.float64)
+            weights = weights / weights.sum() if weights.sum() else weights
+            report[average] = {
+                name: float(sum(w * report[label][name] for w, label in zip(weights, ('0', '1'))))
+                for name in ('precision', 'recall', 'f1-score')
+            }
+            report[average]['support'] = int(total)
+        return report
+
+    # Laporan teks dengan format yang sama seperti sklearn.metrics.classification_report
+    def classification_report(self, threshold=0.5, digits=2):
+        metrics = self.classification_metrics(threshold)
+        width = len('weighted avg')
+        headers = ['precision', 'recall', 'f1-score', 'support']
+        lines = [f"{'':>{width}s} " + ''.join(f" {h:>9}" for h in headers), '']
+        for label in ('0', '1'):
+            row = metrics[label]
+            lines.append(f"{label:>{width}s} " + ''.join(f" {row[h]:>9.{digits}f}" for h in headers[:3])
+                         + f" {row['support']:>9}")
+        lines.append('')
+        lines.append(f"{'accuracy':>{width}s} " + f" {'':>9}" * 2
+                     + f" {metrics['accuracy']:>9.{digits}f}" + f" {metrics['macro avg']['support']:>9}")
+        for average in ('macro avg', 'weighted avg'):
+            row = metrics[average]
+            lines.append(f"{average:>{width}s} " + ''.join(f" {row[h]:>9.{digits}f}" for h in headers[:3])
+                         + f" {row['support']:>9}")
+        return '\n'.join(lines) + '\n'
+
+# Fungsi untuk mengevaluasi model pada beberapa row group; dijalankan di proses worker
+def evaluate_row_groups(model, row_groups, path=PARQUET_PATH, n_bins=DEFAULT_BINS):
+    histogram = ScoreHistogram(n_bins)
+    parquet_file = open_parquet(path)
+    for i in row_groups:
+        df = to_frame(parquet_file.read_row_group(i, columns=FEATURE_COLUMNS + ['churn']))
+        histogram.update(churn_labels(df), model.predict_proba(df[FEATURE_COLUMNS])[:, 1])
+    return histogram
+
+# Fungsi untuk mengevaluasi model pada seluruh dataset per row group (memori terbatas satu
+# row group per worker). Dengan n_workers > 1 row group dibagi ke beberapa proses dan
+# histogram hasilnya digabung.
+def evaluate_model(model=None, path=PARQUET_PATH, n_workers=1, n_bins=DEFAULT_BINS):
+    if model is None:
+        from scripts.scoring import load_compiled_model
+        model = load_compiled_model()
+    n_row_groups = open_parquet(path).metadata.num_row_groups
+    if n_workers <= 1:
+        return evaluate_row_groups(model, range(n_row_groups), path, n_bins)
+
+    histogram = ScoreHistogram(n_bins)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        parts = [list(range(n_row_groups))[i::n_workers] for i in range(n_workers)]
+        for part in executor.map(evaluate_row_groups, [model] * n_workers, parts,
+                                 [path] * n_workers, [n_bins] * n_workers):
+            histogram.merge(part)
+    return histogram
+
+def print_evaluation(histogram, threshold=0.5):
+    print("Classification Report:")
+    print(histogram.classification_report(threshold))
+    print("Confusion Matrix:")
+    print(histogram.confusion_matrix(threshold))
+    print(f"ROC AUC Score: {histogram.auc():.4f} (error <= {histogram.auc_error_bound():.2e})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluasi model churn pada seluruh dataset (out-of-core)")
+    parser.add_argument('--data-path', default=PARQUET_PATH)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--bins', type=int, default=DEFAULT_BINS)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    histogram = evaluate_model(path=args.data_path, n_workers=args.workers, n_bins=args.bins)
+    print(f"Evaluated {histogram.n_positive + histogram.n_negative} rows")
+    print_evaluation(histogram, args.threshold)
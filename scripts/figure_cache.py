@@ -0,0 +1,147 @@
+import io
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from matplotlib.figure import Figure
+
+from scripts.metrics import increment, timer
+
+# Batas cache gambar: jumlah entri dan total ukuran byte (mana yang tercapai lebih dulu)
+MAX_FIGURES = 128
+MAX_BYTES = 64 * 1024 * 1024
+
+# Resolusi sama seperti st.pyplot agar tampilan tidak berubah
+SAVEFIG_KWARGS = {'dpi': 200, 'bbox_inches': 'tight'}
+
+# Context manager untuk membuat figure yang pasti ditutup, juga saat terjadi error,
+# sehingga figure tidak menumpuk di registry pyplot selama sesi berjalan
+@contextmanager
+def figure(figsize=(10, 6)):
+    # pyplot (dan backend-nya) baru diimpor saat chart analisis pertama dirender
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=figsize)
+    try:
+        yield fig, ax
+    finally:
+        plt.close(fig)
+
+def figure_bytes(fig, fmt='png'):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, **SAVEFIG_KWARGS)
+    return buffer.getvalue()
+
+# Cache LRU untuk gambar yang sudah dirender (byte PNG/SVG), dipakai bersama oleh semua sesi.
+# Kunci: (chart_id, versi data, versi model, parameter, format).
+class FigureCache:
+    def __init__(self, max_figures=MAX_FIGURES, max_bytes=MAX_BYTES):
+        self.max_figures = max_figures
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(chart_id, data_version=None, model_version=None, params=None, fmt='png'):
+        return (chart_id, data_version, model_version, tuple(sorted((params or {}).items())), fmt)
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._size += len(image)
+            while self._entries and (len(self._entries) > self.max_figures or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    # Fungsi untuk mengambil gambar dari cache, atau membuatnya dengan `create()` (mengembalikan byte)
+    def cached(self, chart_id, create, data_version=None, model_version=None, params=None, fmt='png'):
+        key = self.make_key(chart_id, data_version, model_version, params, fmt)
+        image = self.get(key)
+        if image is None:
+            increment('churn_figure_cache_misses_total', chart=chart_id)
+            with timer('render', component='figure', chart=chart_id):
+                image = create()
+            self.put(key, image)
+        else:
+            increment('churn_figure_cache_hits_total', chart=chart_id)
+        return image
+
+    # Fungsi untuk mengambil gambar dari cache, atau merender `draw(ax)` pada figure baru,
+    # menyimpan byte hasilnya, lalu menutup figure
+    def render(self, chart_id, draw, figsize=(10, 6), data_version=None, model_version=None,
+               params=None, fmt='png'):
+        def create():
+            with figure(figsize) as (fig, ax):
+                draw(ax)
+                return figure_bytes(fig, fmt)
+        return self.cached(chart_id, create, data_version, model_version, params, fmt)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                'figures': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+# Cache default yang dipakai aplikasi
+FIGURE_CACHE = FigureCache()
+
+# Gauge probabilitas churn yang dibangun sekali; setiap render hanya mengubah lebar bar,
+# warna, dan label, lalu menyimpan figure ke byte
+class GaugeTemplate:
+    def __init__(self, figsize=(6, 3)):
+        # Figure dibuat tanpa pyplot agar tidak tercatat di registry figure global
+        self.fig = Figure(figsize=figsize)
+        ax = self.fig.subplots()
+
+        # Membuat gauge chart sederhana
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 0.5)
+        ax.set_axis_off()
+
+        # Tambahkan gauge background
+        ax.barh(0.2, 1, height=0.1, color='lightgrey', alpha=0.5)
+
+        # Gauge bar dan label persentase yang diubah setiap render
+        self.bar = ax.barh(0.2, 0, height=0.1, color='green')[0]
+        self.label = ax.text(0.5, 0.35, "", ha='center', fontsize=14, fontweight='bold')
+
+        # Tambahkan teks
+        ax.text(0, 0.35, "0%", ha='left', fontsize=12)
+        ax.text(1, 0.35, "100%", ha='right', fontsize=12)
+
+        # Title
+        ax.text(0.5, 0.45, "Probabilitas Churn", ha='center', fontsize=14)
+        self._lock = threading.Lock()
+
+    # Warna bar mengikuti `churn` (hasil prediksi dari probabilitas yang belum dibulatkan), agar
+    # probabilitas yang dibulatkan untuk label/cache tidak menggeser warna melewati threshold
+    def render(self, probability, churn=None, fmt='png'):
+        if churn is None:
+            churn = probability >= 0.5
+        with self._lock:
+            self.bar.set_width(probability)
+            self.bar.set_color('red' if churn else 'green')
+            self.label.set_text(f"{probability*100:.1f}%")
+            return figure_bytes(self.fig, fmt)
@@ -1,25 +1,47 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-import os
-from sklearn.preprocessing import LabelEncoder
 
-def generate_dummy_data_func():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
+from scripts.data_store import PARQUET_PATH, ROW_GROUP_SIZE, CustomerDataWriter
+from scripts.summary_stats import CustomerSummary, print_summary
+
+# Default ukuran dataset dan chunk
+N_SAMPLES = 10000
+CHUNK_SIZE = ROW_GROUP_SIZE
+
+# Rentang nilai (batas atas eksklusif, seperti rng.integers) dan distribusi purchase_amount
+AGE_RANGE = (18, 70)
+TENURE_RANGE = (1, 120)  # in months (1 month to 10 years)
+PURCHASE_MEAN = 1500000
+PURCHASE_STD = 200000
 
-    # Number of samples
-    n_samples = 10000
+# Mean dan std teoretis distribusi uniform diskrit [low, high)
+def _uniform_int_moments(low, high):
+    n = high - low
+    return (low + high - 1) / 2, np.sqrt((n ** 2 - 1) / 12)
+
+# Fungsi untuk membuat satu chunk data. Setiap chunk memakai generator sendiri dari
+# SeedSequence, dan standardisasi memakai mean/std teoretis (bukan mean chunk), sehingga
+# isi chunk tidak bergantung pada chunk lain maupun worker yang mengerjakannya.
+def generate_chunk(n_samples, seed_sequence):
+    rng = np.random.default_rng(seed_sequence)
 
     # Generate data
-    age = np.random.randint(18, 70, n_samples)
-    gender = np.random.choice(['Male', 'Female'], n_samples, p=[0.5, 0.5])
-    purchase_amount = np.random.normal(1500000, 200000, n_samples)  # mean=1500000, std=200000
-    tenure = np.random.randint(1, 120, n_samples)  # in months (1 month to 10 years)
+    age = rng.integers(*AGE_RANGE, n_samples)
+    gender = rng.choice(['Male', 'Female'], n_samples, p=[0.5, 0.5])
+    purchase_amount = rng.normal(PURCHASE_MEAN, PURCHASE_STD, n_samples)
+    tenure = rng.integers(*TENURE_RANGE, n_samples)
 
     # Standardize variables to make the effect sizes more controllable
-    age_std = (age - np.mean(age)) / np.std(age)
-    purchase_amount_std = (purchase_amount - np.mean(purchase_amount)) / np.std(purchase_amount)
-    tenure_std = (tenure - np.mean(tenure)) / np.std(tenure)
+    age_mean, age_std = _uniform_int_moments(*AGE_RANGE)
+    tenure_mean, tenure_std = _uniform_int_moments(*TENURE_RANGE)
+    age_std = (age - age_mean) / age_std
+    purchase_amount_std = (purchase_amount - PURCHASE_MEAN) / PURCHASE_STD
+    tenure_std = (tenure - tenure_mean) / tenure_std
 
     # Create gender effect (females have higher churn)
     gender_effect = np.where(gender == 'Female', 1, 0)
@@ -32,17 +54,17 @@ def generate_dummy_data_func():
         - 2 * purchase_amount_std  # negative correlation with purchase amount
         - 1 * tenure_std  # stronger negative correlation with tenure
         + gender_effect  # women churn more
-        + np.random.normal(0, 0.1, n_samples)  # add some noise
+        + rng.normal(0, 0.1, n_samples)  # add some noise
     )
 
     churn_prob = 1 / (1 + np.exp(-churn_prob))  # sigmoid to keep values between 0 and 1
     churn_prob = np.clip(churn_prob, 0.05, 0.95)  # limit probabilities between 5% and 95%
 
     # Generate churn label based on probability
-    churn = np.random.binomial(1, churn_prob)
+    churn = rng.binomial(1, churn_prob)
 
     # Create DataFrame
-    df = pd.DataFrame({
+    return pd.DataFrame({
         'age': age,
         'gender': gender,
         'purchase_amount': purchase_amount.round(2),
@@ -50,42 +72,80 @@ def generate_dummy_data_func():
         'churn': churn
     })
 
-    # Export to CSV
-    df.to_csv('data/customer_data.csv', index=False)
+# Fungsi untuk membuat satu chunk beserta ringkasan statistiknya (dihitung di worker)
+def generate_summarized_chunk(n_samples, seed_sequence):
+    chunk = generate_chunk(n_samples, seed_sequence)
+    return chunk, CustomerSummary().update(chunk)
+
+# Fungsi untuk menghasilkan pasangan (chunk, ringkasan) secara berurutan. Dengan n_workers > 1
+# chunk dibuat di beberapa proses, tetapi tetap dikembalikan sesuai urutan dan paling banyak
+# 2 * n_workers chunk yang ditahan di memori.
+def iter_chunks(n_samples, chunk_size, seed_sequence, n_workers=1):
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = seed_sequence.spawn(len(sizes))
+
+    if n_workers <= 1:
+        for size, seed in zip(sizes, seeds):
+            yield generate_summarized_chunk(size, seed)
+        return
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        pending = deque()
+        for size, seed in zip(sizes, seeds):
+            pending.append(executor.submit(generate_summarized_chunk, size, seed))
+            if len(pending) >= 2 * n_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def generate_dummy_data_func(n_samples=N_SAMPLES, chunk_size=CHUNK_SIZE, n_workers=1, seed=None,
+                             output_path=PARQUET_PATH, progress=None):
+    if n_samples < 1 or chunk_size < 1:
+        raise ValueError("n_samples dan chunk_size harus lebih besar dari 0")
 
-    print(f"Generated dataset with {n_samples} samples and saved to data/customer_data.csv")
+    # Create data directory if it doesn't exist
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    # Output hanya bergantung pada seed dan chunk_size, tidak pada jumlah worker
+    seed_sequence = np.random.SeedSequence(seed)
+    summary = CustomerSummary()
+    n_chunks = -(-n_samples // chunk_size)
+
+    # Chunk langsung ditulis ke Parquet dan ringkasannya digabung; hanya chunk pertama
+    # yang disimpan untuk preview
+    with CustomerDataWriter(output_path) as writer:
+        for i, (chunk, chunk_summary) in enumerate(iter_chunks(n_samples, chunk_size, seed_sequence, n_workers)):
+            writer.write(chunk)
+            summary.merge(chunk_summary)
+            if i == 0:
+                df = chunk
+            if progress is not None:
+                progress((i + 1) / n_chunks, f"Generated chunk {i + 1}/{n_chunks}")
+
+    print(f"Generated dataset with {n_samples} samples and saved to {output_path} "
+          f"(seed={seed_sequence.entropy}, chunk_size={chunk_size})")
     print("\nData preview:")
     print(df.head())
 
-    print("\nSummary statistics:")
-    print(df.describe())
-
-    print("\nChurn distribution:")
-    print(df['churn'].value_counts(normalize=True))
-
-    # Check correlation between features and churn
-    print("\nCorrelation with churn:")
-    numeric_cols = ['age', 'purchase_amount', 'tenure']
-    for col in numeric_cols:
-        correlation = df[col].corr(df['churn'])
-        print(f"{col}: {correlation:.4f}")
-
-    # Encode gender for correlation analysis
-    le = LabelEncoder()
-    df['gender_encoded'] = le.fit_transform(df['gender'])
-    correlation = df['gender_encoded'].corr(df['churn'])
-    print(f"gender: {correlation:.4f}")
-
-    # Check churn rate by gender
-    print("\nChurn rate by gender:")
-    print(df.groupby('gender')['churn'].mean())
+    print_summary(summary)
     
     # Return some statistics for display in the app
     return {
         "samples": n_samples,
-        "churn_rate": df['churn'].mean() * 100,
+        "seed": seed_sequence.entropy,
+        "churn_rate": summary.churn_rate * 100,
         "preview": df.head().to_dict()
     }
 
 if __name__ == "__main__":
-    generate_dummy_data_func()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Buat data dummy pelanggan")
+    parser.add_argument('--n-samples', type=int, default=N_SAMPLES)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Jumlah proses untuk membuat chunk secara paralel")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed untuk data yang bisa direproduksi (output identik untuk seed dan chunk size yang sama)")
+    parser.add_argument('--output', default=PARQUET_PATH)
+    args = parser.parse_args()
+
+    generate_dummy_data_func(args.n_samples, args.chunk_size, args.workers, args.seed, args.output)
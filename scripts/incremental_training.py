@@ -0,0 +1,135 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from scripts.data_store import PARQUET_PATH, churn_labels, load_customer_data, load_rows_after, model_features
+from scripts.evaluation import ScoreHistogram
+from scripts.scoring import load_churn_model
+from scripts.summary_stats import CustomerSummary
+from scripts.train_model import (
+    MODEL_PATH, RESERVOIR_PATH, RESERVOIR_SIZE, load_training_report, print_phase_timings,
+    resolve_cpu_budget, save_reservoir, save_trained_model, timed_phase, write_training_report,
+)
+
+# Jumlah pohon baru yang ditambahkan per update
+DEFAULT_NEW_TREES = 20
+
+# Fungsi untuk memperbarui sampel reservoir dengan baris baru (Algorithm R).
+# Setiap baris dari seluruh histori (rows_seen + baris baru) punya peluang sama untuk ada di reservoir.
+def update_reservoir(reservoir, new_rows, rows_seen, size=RESERVOIR_SIZE, seed=None):
+    rng = np.random.default_rng(seed)
+    reservoir = reservoir.reset_index(drop=True)
+    new_rows = new_rows.reset_index(drop=True)
+
+    # Isi reservoir sampai penuh terlebih dahulu
+    n_fill = max(0, min(size - len(reservoir), len(new_rows)))
+    combined = pd.concat([reservoir, new_rows], ignore_index=True)
+    take = np.arange(len(reservoir) + n_fill)
+
+    # Baris berikutnya menggantikan slot acak dengan peluang size / (posisi + 1)
+    positions = rows_seen + n_fill + np.arange(len(new_rows) - n_fill)
+    slots = rng.integers(0, positions + 1)
+    for i in np.flatnonzero(slots < size):
+        take[slots[i]] = len(reservoir) + n_fill + i
+
+    return combined.iloc[take].reset_index(drop=True)
+
+# Fungsi untuk melatih model secara incremental: pohon baru ditumbuhkan dengan warm_start
+# hanya dari baris baru (opsional ditambah sampel reservoir data lama), dan pohon tertua
+# dibuang jika hutan melebihi max_trees. Preprocessor tidak di-fit ulang karena pohon lama
+# bergantung pada skala fitur yang sama.
+def update_churn_model(n_new_trees=DEFAULT_NEW_TREES, max_trees=None, use_reservoir=False,
+                       data_path=PARQUET_PATH, cpu_budget=None, build_score_table=True):
+    report = load_training_report()
+    if report is None or 'rows_seen' not in report or not os.path.exists(MODEL_PATH):
+        raise ValueError("Model awal belum tersedia. Jalankan train_churn_model terlebih dahulu.")
+
+    n_jobs = resolve_cpu_budget(cpu_budget)
+    timings = {}
+    rows_seen = report['rows_seen']
+
+    print(f"Loading rows added after row {rows_seen}...")
+    with timed_phase(timings, 'load'):
+        # Hanya baris setelah training terakhir yang dibaca (row group lama dilewati)
+        new_rows = load_rows_after(rows_seen, path=data_path)
+        model = load_churn_model(MODEL_PATH)
+        if os.path.exists(RESERVOIR_PATH):
+            reservoir = load_customer_data(path=RESERVOIR_PATH)
+        else:
+            reservoir = new_rows.iloc[:0]
+
+    if len(new_rows) == 0:
+        print("No new rows since the last training, model unchanged.")
+        return model
+
+    fit_rows = pd.concat([reservoir, new_rows], ignore_index=True) if use_reservoir else new_rows
+    X_fit = model_features(fit_rows)
+    y_fit = churn_labels(fit_rows)
+    classifier = model.named_steps['classifier']
+    if set(np.unique(y_fit)) != set(classifier.classes_):
+        raise ValueError(
+            "Data untuk pohon baru harus memuat semua kelas churn; "
+            "tambah data baru atau gunakan use_reservoir=True"
+        )
+
+    with threadpool_limits(limits=n_jobs):
+        # Evaluasi prequential: model lama diuji pada data baru sebelum data itu dipakai training
+        print("Evaluating current model on new rows...")
+        with timed_phase(timings, 'evaluate'):
+            X_new = model_features(new_rows)
+            y_new = churn_labels(new_rows)
+            roc_auc = ScoreHistogram().update(y_new, model.predict_proba(X_new)[:, 1]).auc() if len(np.unique(y_new)) > 1 else None
+        if roc_auc is not None:
+            print(f"ROC AUC on new rows (before update): {roc_auc:.4f}")
+
+        n_old = len(classifier.estimators_)
+        print(f"Growing {n_new_trees} new trees on {len(fit_rows)} rows using {n_jobs} core(s)...")
+        with timed_phase(timings, 'fit'):
+            X_fit_transformed = model.named_steps['preprocessor'].transform(X_fit)
+            classifier.set_params(warm_start=True, n_estimators=n_old + n_new_trees, n_jobs=n_jobs)
+            classifier.fit(X_fit_transformed, y_fit)
+
+    # Buang pohon tertua agar ukuran hutan tetap terbatas
+    if max_trees is not None and len(classifier.estimators_) > max_trees:
+        n_retired = len(classifier.estimators_) - max_trees
+        classifier.estimators_ = classifier.estimators_[n_retired:]
+        print(f"Retired {n_retired} oldest trees")
+    classifier.set_params(warm_start=False, n_estimators=len(classifier.estimators_), n_jobs=None)
+
+    version = save_trained_model(model, build_score_table=build_score_table, n_jobs=n_jobs, timings=timings,
+                                 info={'source': 'incremental_training', 'roc_auc_new_rows': roc_auc,
+                                       'rows_seen': rows_seen + len(new_rows)})
+    save_reservoir(update_reservoir(reservoir, new_rows, rows_seen))
+
+    print_phase_timings(timings)
+
+    report.update({
+        'model_hash': version['content_hash'],
+        'model_version': version['version'],
+        'cpu_budget': n_jobs,
+        'n_estimators': len(classifier.estimators_),
+        'rows_seen': rows_seen + len(new_rows),
+        'last_update_rows': len(fit_rows),
+        'roc_auc_new_rows': roc_auc,
+        'new_rows_summary': CustomerSummary().update(new_rows).to_dict(),
+        'timings': timings,
+    })
+    write_training_report(report)
+
+    print(f"Model updated with {len(new_rows)} new rows ({len(classifier.estimators_)} trees)")
+    return model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update model churn secara incremental dari data baru")
+    parser.add_argument('--new-trees', type=int, default=DEFAULT_NEW_TREES)
+    parser.add_argument('--max-trees', type=int, default=None,
+                        help="Buang pohon tertua jika jumlah pohon melebihi batas ini")
+    parser.add_argument('--use-reservoir', action='store_true',
+                        help="Latih pohon baru dengan data baru + sampel reservoir data lama")
+    parser.add_argument('--cpu-budget', type=int, default=None)
+    args = parser.parse_args()
+
+    update_churn_model(args.new_trees, args.max_trees, args.use_reservoir, cpu_budget=args.cpu_budget)
@@ -1,11 +1,15 @@
+import os
+import sys
+
+# Tambahkan root repository ke sys.path agar paket `scripts` bisa diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import streamlit as st
-import pandas as pd
 import numpy as np
-import pickle
-import os
 import matplotlib.pyplot as plt
 import seaborn as sns
-from analysis import run_analysis
+from scripts.analysis import run_analysis
+from scripts.scoring import load_compiled_model, predict_churn_batch
 
 # Setting page config
 st.set_page_config(
@@ -14,27 +18,25 @@ st.set_page_config(
     layout="wide"
 )
 
-# Fungsi untuk memuat model
+# Fungsi untuk memuat model (dikompilasi menjadi tabel node NumPy untuk prediksi cepat)
 @st.cache_resource
 def load_model():
-    with open('models/churn_model.pkl', 'rb') as file:
-        model = pickle.load(file)
-    return model
+    return load_compiled_model()
 
 # Fungsi untuk melakukan prediksi
 def predict_churn(age, gender, purchase_amount, tenure):
-    # Buat DataFrame dengan format yang sama seperti data training
-    input_data = pd.DataFrame({
+    # Prediksi satu pelanggan memakai jalur batch yang sama (batch berisi satu baris)
+    input_data = {
         'age': [age],
         'gender': [gender],
         'purchase_amount': [purchase_amount],
         'tenure': [tenure]
-    })
+    }
     
     # Lakukan prediksi
-    model = load_model()
-    prediction_proba = model.predict_proba(input_data)[0][1]
-    prediction = 1 if prediction_proba >= 0.5 else 0
+    predictions, probabilities = predict_churn_batch(input_data, model=load_model())
+    prediction = int(predictions[0])
+    prediction_proba = probabilities[0]
     
     return prediction, prediction_proba
 
@@ -0,0 +1,222 @@
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+
+from scripts.atomic_io import atomic_write
+
+JOBS_DIR = 'models/jobs'
+
+# Fungsi yang bisa dijalankan sebagai job: nama job -> (modul, fungsi)
+JOB_TARGETS = {
+    'generate_data': ('scripts.generate_dummy_data', 'generate_dummy_data_func'),
+    'train_model': ('scripts.train_model', 'train_churn_model'),
+}
+
+# Status akhir job; status lain: 'queued' dan 'running'
+FINAL_STATES = ('succeeded', 'failed', 'cancelled')
+
+# Lama menunggu job berhenti sendiri setelah diminta batal, sebelum proses dihentikan paksa.
+# Aman karena semua artifact ditulis ke path sementara lalu di-rename.
+CANCEL_GRACE_SECONDS = 5.0
+
+# Job 'queued' tanpa pid dan tanpa proses di runner ini (misalnya app di-restart sebelum worker
+# sempat mulai) dianggap gagal setelah selang ini, agar tidak memblokir job baru selamanya
+QUEUED_TIMEOUT_SECONDS = 60.0
+
+# Jumlah status job selesai yang disimpan
+MAX_FINISHED_JOBS = 20
+
+class JobCancelled(Exception):
+    pass
+
+class JobAlreadyRunning(Exception):
+    pass
+
+def _status_path(jobs_dir, job_id):
+    return os.path.join(jobs_dir, f"{job_id}.json")
+
+def _cancel_path(jobs_dir, job_id):
+    return os.path.join(jobs_dir, f"{job_id}.cancel")
+
+def write_status(jobs_dir, status):
+    atomic_write(_status_path(jobs_dir, status['job_id']),
+                 lambda f: json.dump(status, f, indent=2, default=str), mode='w')
+
+def read_status(jobs_dir, job_id):
+    try:
+        with open(_status_path(jobs_dir, job_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+# Callback progres yang diberikan ke fungsi job. Setiap laporan progres juga menjadi titik
+# pembatalan: jika ada permintaan batal, JobCancelled dilempar di dalam proses worker.
+class JobProgress:
+    def __init__(self, jobs_dir, status):
+        self.jobs_dir = jobs_dir
+        self.status = status
+
+    def __call__(self, fraction, message=''):
+        if os.path.exists(_cancel_path(self.jobs_dir, self.status['job_id'])):
+            raise JobCancelled()
+        self.status.update(progress=float(fraction), message=message)
+        write_status(self.jobs_dir, self.status)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Fungsi yang dijalankan di proses worker
+def _run_job(jobs_dir, job_id, kwargs):
+    status = read_status(jobs_dir, job_id)
+    status.update(state='running', pid=os.getpid(), started_at=time.time())
+    write_status(jobs_dir, status)
+
+    module_name, function_name = JOB_TARGETS[status['kind']]
+    target = getattr(importlib.import_module(module_name), function_name)
+    progress = JobProgress(jobs_dir, status)
+    try:
+        progress(0.0, "Starting")
+        result = target(progress=progress, **kwargs)
+        status.update(state='succeeded', progress=1.0, message="Done",
+                      result=result if isinstance(result, dict) else None)
+    except JobCancelled:
+        status.update(state='cancelled', message="Cancelled")
+    except Exception as e:
+        status.update(state='failed', message=str(e), error=traceback.format_exc())
+    status['finished_at'] = time.time()
+    write_status(jobs_dir, status)
+
+# Menjalankan job (generate data, training) di proses terpisah. Status dan progres disimpan
+# sebagai file JSON di jobs_dir sehingga bisa dibaca oleh semua sesi dan proses.
+# Proses worker dibuat dengan metode 'spawn' karena proses Streamlit memakai banyak thread, dan
+# tidak dijadikan daemon agar job generate data tetap bisa membuat proses worker sendiri.
+class JobRunner:
+    def __init__(self, jobs_dir=JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        self._processes = {}
+        self._cancel_requested = {}
+        self._acknowledged = set()
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    # Fungsi untuk memulai job baru; hanya satu job aktif per jenis. Pengecekan job aktif dan
+    # penulisan status dilakukan di bawah lock karena runner dipakai bersama oleh semua sesi.
+    def submit(self, kind, **kwargs):
+        if kind not in JOB_TARGETS:
+            raise ValueError(f"Jenis job tidak dikenal: {kind}")
+        with self._lock:
+            active = self.active_job(kind)
+            if active is not None:
+                raise JobAlreadyRunning(f"Job {active['job_id']} masih berjalan")
+
+            job_id = f"{kind}-{time.time_ns()}"
+            write_status(self.jobs_dir, {
+                'job_id': job_id,
+                'kind': kind,
+                'state': 'queued',
+                'progress': 0.0,
+                'message': "Queued",
+                'created_at': time.time(),
+            })
+            process = self._context.Process(target=_run_job, args=(self.jobs_dir, job_id, kwargs))
+            process.start()
+            self._processes[job_id] = process
+        self._prune()
+        return job_id
+
+    # Fungsi untuk membaca status job; juga mendeteksi worker yang mati tanpa menulis status akhir
+    def status(self, job_id):
+        status = read_status(self.jobs_dir, job_id)
+        if status is None or status['state'] in FINAL_STATES:
+            return status
+
+        process = self._processes.get(job_id)
+        if process is None:
+            # Job dari proses lain (misalnya sebelum app di-restart): cek pid worker-nya
+            if status.get('pid') is not None and not _pid_alive(status['pid']):
+                status.update(state='failed', message="Worker tidak lagi berjalan", finished_at=time.time())
+                write_status(self.jobs_dir, status)
+            elif status.get('pid') is None and time.time() - status['created_at'] > QUEUED_TIMEOUT_SECONDS:
+                status.update(state='failed', message="Worker tidak pernah dimulai", finished_at=time.time())
+                write_status(self.jobs_dir, status)
+            return status
+        if not process.is_alive():
+            # Worker mungkin baru saja menulis status akhir
+            status = read_status(self.jobs_dir, job_id)
+            if status['state'] in FINAL_STATES:
+                return status
+            status.update(state='failed', message=f"Worker berhenti (exit code {process.exitcode})",
+                          finished_at=time.time())
+            write_status(self.jobs_dir, status)
+        elif job_id in self._cancel_requested and time.time() - self._cancel_requested[job_id] > CANCEL_GRACE_SECONDS:
+            process.terminate()
+            process.join(timeout=CANCEL_GRACE_SECONDS)
+            status.update(state='cancelled', message="Cancelled (terminated)", finished_at=time.time())
+            write_status(self.jobs_dir, status)
+        return status
+
+    def cancel(self, job_id):
+        status = self.status(job_id)
+        if status is not None and status['state'] not in FINAL_STATES and status.get('pid') is None \
+                and job_id not in self._processes:
+            # Job antre tanpa worker: tidak ada proses yang akan membaca file .cancel
+            status.update(state='cancelled', message="Cancelled", finished_at=time.time())
+            write_status(self.jobs_dir, status)
+            return
+        with open(_cancel_path(self.jobs_dir, job_id), 'w'):
+            pass
+        self._cancel_requested.setdefault(job_id, time.time())
+
+    # Fungsi untuk menandai job selesai yang sudah ditindaklanjuti (misalnya reload model).
+    # Hanya mengembalikan True sekali per job, dan hanya untuk job yang dimulai runner ini.
+    def acknowledge(self, job_id):
+        with self._lock:
+            if job_id not in self._processes or job_id in self._acknowledged:
+                return False
+            self._acknowledged.add(job_id)
+            return True
+
+    def wait(self, job_id, timeout=None, poll_interval=0.2):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            status = self.status(job_id)
+            if status is None or status['state'] in FINAL_STATES:
+                return status
+            if deadline is not None and time.time() > deadline:
+                return status
+            time.sleep(poll_interval)
+
+    # Daftar status job, terbaru lebih dulu
+    def jobs(self, kind=None):
+        statuses = []
+        for name in os.listdir(self.jobs_dir):
+            if name.endswith('.json'):
+                status = self.status(name[:-len('.json')])
+                if status is not None and (kind is None or status['kind'] == kind):
+                    statuses.append(status)
+        return sorted(statuses, key=lambda s: s['created_at'], reverse=True)
+
+    def active_job(self, kind=None):
+        for status in self.jobs(kind):
+            if status['state'] not in FINAL_STATES:
+                return status
+        return None
+
+    def _prune(self):
+        finished = [s for s in self.jobs() if s['state'] in FINAL_STATES]
+        for status in finished[MAX_FINISHED_JOBS:]:
+            for path in (_status_path(self.jobs_dir, status['job_id']), _cancel_path(self.jobs_dir, status['job_id'])):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._processes.pop(status['job_id'], None)
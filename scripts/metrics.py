@@ -0,0 +1,221 @@
+import bisect
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Instrumentasi aktif jika CHURN_METRICS=1; CHURN_METRICS_LOG=<path> juga menulis setiap
+# pengukuran sebagai satu baris JSON (dan otomatis mengaktifkan instrumentasi)
+METRICS_ENABLED = os.environ.get('CHURN_METRICS') == '1'
+METRICS_LOG_PATH = os.environ.get('CHURN_METRICS_LOG') or None
+
+# Profiling per request (cProfile) hanya boleh dinyalakan jika CHURN_PROFILING=1,
+# karena setiap profil ditulis sebagai file di PROFILE_DIR
+PROFILING_ENABLED = os.environ.get('CHURN_PROFILING') == '1'
+PROFILE_DIR = 'models/profiles'
+
+# Batas atas bucket histogram (detik), dari 50 mikrodetik (lookup) sampai 10 menit (training)
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+STAGE_METRIC = 'churn_stage_seconds'
+
+# Context manager kosong yang dipakai ulang saat instrumentasi mati, sehingga timer()
+# hanya berisi satu pengecekan atribut
+_DISABLED = nullcontext()
+
+# Histogram kumulatif seperti Prometheus: jumlah observasi <= setiap batas bucket
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    # Perkiraan kuantil dari bucket (batas atas bucket tempat kuantil berada)
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        target = q * self.count
+        for bound, cumulative in zip(self.buckets + (float('inf'),), self.cumulative_counts()):
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'started')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in items) + '}'
+
+# Kumpulan counter dan histogram untuk satu proses. Saat tidak aktif, timer() mengembalikan
+# context manager kosong dan increment()/observe() langsung kembali.
+class MetricsRegistry:
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled or log_path is not None
+        self.log_path = log_path
+        self._log_file = None
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, log_path=None):
+        self.enabled = True
+        if log_path is not None and log_path != self.log_path:
+            self.log_path = log_path
+            self._log_file = None
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def increment(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+        if self.log_path is not None:
+            self._log({'ts': time.time(), 'metric': name, 'seconds': value, **labels})
+
+    # Fungsi untuk mengukur durasi blok kode sebagai histogram churn_stage_seconds{stage=...}
+    def timer(self, stage, **labels):
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, STAGE_METRIC, dict(labels, stage=stage))
+
+    # Log terstruktur: satu objek JSON per baris, ditambahkan (append) ke log_path.
+    # File dibuka sekali dengan line buffering, sehingga setiap baris langsung ditulis utuh.
+    def _log(self, record):
+        line = json.dumps(dict(record, pid=os.getpid())) + '\n'
+        with self._lock:
+            if self._log_file is None:
+                self._log_file = open(self.log_path, 'a', buffering=1)
+            self._log_file.write(line)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                'histograms': [
+                    {
+                        'name': name,
+                        'labels': dict(labels),
+                        'count': h.count,
+                        'sum': h.sum,
+                        'p50': h.quantile(0.5),
+                        'p95': h.quantile(0.95),
+                        'p99': h.quantile(0.99),
+                        'buckets': dict(zip([str(b) for b in h.buckets] + ['+Inf'], h.cumulative_counts())),
+                    }
+                    for (name, labels), h in sorted(self._histograms.items())
+                ],
+            }
+
+    # Export dalam format teks Prometheus (exposition format 0.0.4)
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self._counters})
+            for metric in counter_names:
+                lines.append(f"# TYPE {metric} counter")
+                for (name, labels), value in sorted(self._counters.items()):
+                    if name == metric:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            histogram_names = sorted({name for name, _ in self._histograms})
+            for metric in histogram_names:
+                lines.append(f"# TYPE {metric} histogram")
+                for (name, labels), h in sorted(self._histograms.items()):
+                    if name != metric:
+                        continue
+                    bounds = [repr(b) for b in h.buckets] + ['+Inf']
+                    for bound, cumulative in zip(bounds, h.cumulative_counts()):
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+# Registry default untuk proses ini
+METRICS = MetricsRegistry(enabled=METRICS_ENABLED, log_path=METRICS_LOG_PATH)
+
+def timer(stage, **labels):
+    return METRICS.timer(stage, **labels)
+
+def increment(name, value=1, **labels):
+    METRICS.increment(name, value, **labels)
+
+def observe(name, value, **labels):
+    METRICS.observe(name, value, **labels)
+
+# Context manager untuk memprofil satu request dengan cProfile. Jika `enabled` False (atau
+# CHURN_PROFILING tidak aktif) tidak melakukan apa-apa. Hasil ditulis ke PROFILE_DIR dan
+# path-nya tersedia di dict yang di-yield (key 'path'), bisa dibuka dengan pstats atau snakeviz.
+@contextmanager
+def profiled(name, enabled=True, profile_dir=PROFILE_DIR):
+    result = {'path': None}
+    if not (enabled and PROFILING_ENABLED):
+        yield result
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        os.makedirs(profile_dir, exist_ok=True)
+        result['path'] = os.path.join(profile_dir, f"{name}-{time.time_ns()}.prof")
+        profiler.dump_stats(result['path'])
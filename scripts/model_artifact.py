@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from scripts.atomic_io import swap_directory
+from scripts.compiled_model import CompiledChurnModel
+
+ARTIFACT_DIR = 'models/churn_model'
+MANIFEST_FILE = 'manifest.json'
+
+# Versi format artifact; naikkan jika struktur manifest atau array berubah
+FORMAT_VERSION = 1
+
+# Array yang disimpan sebagai file .npy terpisah (dapat di-mmap)
+ARRAY_FIELDS = [
+    'mean', 'scale', 'feature', 'threshold', 'children', 'leaf_value', 'roots',
+    'classes_', 'feature_importances_',
+]
+
+# Metadata kecil yang disimpan langsung di manifest
+METADATA_FIELDS = [
+    'numeric_features', 'categorical_feature', 'categories', 'encoded_categories',
+    'feature_names', 'max_depth',
+]
+
+class ModelArtifactError(Exception):
+    pass
+
+# Fungsi untuk menghitung hash isi artifact dari hash tiap array dan metadata
+def _content_hash(array_hashes, metadata):
+    digest = hashlib.sha256()
+    digest.update(json.dumps(metadata, sort_keys=True).encode('utf-8'))
+    for name in sorted(array_hashes):
+        digest.update(name.encode('utf-8'))
+        digest.update(array_hashes[name].encode('utf-8'))
+    return digest.hexdigest()
+
+def _array_hash(array):
+    return hashlib.sha256(np.ascontiguousarray(array).view(np.uint8)).hexdigest()
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    return value
+
+# Ukuran artifact model dalam byte (jumlah byte semua array yang disimpan)
+def artifact_nbytes(model):
+    return int(sum(np.asarray(getattr(model, name)).nbytes for name in ARRAY_FIELDS))
+
+# Fungsi untuk menulis CompiledChurnModel sebagai manifest + array NumPy mentah ke direktori
+# `path` yang sudah ada (tidak atomik; lihat save_model_artifact dan model_registry)
+def write_model_artifact(model, path):
+    arrays = {}
+    array_hashes = {}
+    for name in ARRAY_FIELDS:
+        array = np.ascontiguousarray(getattr(model, name))
+        if array.dtype == object:
+            array = array.astype(str)
+        file_name = f"{name.rstrip('_')}.npy"
+        np.save(os.path.join(path, file_name), array, allow_pickle=False)
+        array_hashes[name] = _array_hash(array)
+        arrays[name] = {
+            'file': file_name,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'sha256': array_hashes[name],
+        }
+
+    metadata = {name: _to_builtin(getattr(model, name)) for name in METADATA_FIELDS}
+    manifest = {
+        'format': 'churn-compiled-forest',
+        'format_version': FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'content_hash': _content_hash(array_hashes, metadata),
+        'metadata': metadata,
+        'arrays': arrays,
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    model.content_hash = manifest['content_hash']
+    return manifest
+
+# Fungsi untuk menyimpan artifact ke `path`. Artifact ditulis ke direktori sementara lalu
+# ditukar secara atomik (swap_directory), sehingga pembaca tidak pernah melihat artifact setengah jadi.
+def save_model_artifact(model, path=ARTIFACT_DIR):
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    manifest = write_model_artifact(model, tmp_path)
+
+    # Tukar direktori lama dengan yang baru
+    swap_directory(tmp_path, path)
+
+    return manifest
+
+# Fungsi untuk membaca dan memvalidasi manifest artifact
+def read_manifest(path=ARTIFACT_DIR):
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ModelArtifactError(f"Manifest tidak ditemukan: {manifest_path}")
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    version = manifest.get('format_version')
+    if version != FORMAT_VERSION:
+        raise ModelArtifactError(
+            f"Versi format artifact {version} tidak didukung (diharapkan {FORMAT_VERSION})"
+        )
+    missing = [name for name in ARRAY_FIELDS if name not in manifest.get('arrays', {})]
+    if missing:
+        raise ModelArtifactError(f"Array tidak ditemukan di manifest: {missing}")
+    return manifest
+
+# Fungsi untuk memuat artifact. Array dibuka dengan mmap_mode='r' sehingga startup hampir instan
+# dan beberapa proses worker berbagi page yang sama. `verify=True` memeriksa hash seluruh isi.
+def load_model_artifact(path=ARTIFACT_DIR, mmap=True, verify=False):
+    # Resolve symlink sekali agar manifest dan array dibaca dari versi yang sama
+    path = os.path.realpath(path)
+    manifest = read_manifest(path)
+
+    arrays = {}
+    array_hashes = {}
+    for name, info in manifest['arrays'].items():
+        array = np.load(os.path.join(path, info['file']), mmap_mode='r' if mmap else None,
+                        allow_pickle=False)
+        if array.dtype.str != info['dtype'] or list(array.shape) != info['shape']:
+            raise ModelArtifactError(f"Array '{name}' tidak sesuai dengan manifest")
+        if verify:
+            array_hashes[name] = _array_hash(array)
+            if array_hashes[name] != info['sha256']:
+                raise ModelArtifactError(f"Hash array '{name}' tidak cocok, artifact rusak")
+        arrays[name] = array
+
+    metadata = manifest['metadata']
+    if verify and _content_hash(array_hashes, metadata) != manifest['content_hash']:
+        raise ModelArtifactError("Content hash artifact tidak cocok")
+
+    model = CompiledChurnModel(
+        numeric_features=metadata['numeric_features'],
+        mean=arrays['mean'],
+        scale=arrays['scale'],
+        categorical_feature=metadata['categorical_feature'],
+        categories=metadata['categories'],
+        encoded_categories=metadata['encoded_categories'],
+        feature=arrays['feature'],
+        threshold=arrays['threshold'],
+        children=arrays['children'],
+        leaf_value=arrays['leaf_value'],
+        roots=arrays['roots'],
+        max_depth=metadata['max_depth'],
+        classes=arrays['classes_'],
+        feature_names=metadata['feature_names'],
+        feature_importances=arrays['feature_importances_'],
+    )
+    model.content_hash = manifest['content_hash']
+    model.artifact_path = path
+    return model
@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from functools import lru_cache
+
+from scripts.atomic_io import atomic_write
+from scripts.model_artifact import load_model_artifact, write_model_artifact
+
+REGISTRY_DIR = 'models/registry'
+
+# File penunjuk versi aktif; isinya nama versi (misalnya "v0003")
+CURRENT_FILE = 'CURRENT'
+
+# Metadata versi (sumber training, metrik, waktu dibuat) di dalam direktori versi
+VERSION_FILE = 'version.json'
+
+# Subdirektori tabel skor di dalam direktori versi
+SCORE_TABLE_SUBDIR = 'score_table'
+
+# Jumlah versi yang disimpan; versi aktif tidak pernah dihapus
+MAX_VERSIONS = 10
+
+# Seberapa sering ModelWatcher memeriksa file CURRENT (detik)
+CHECK_INTERVAL_SECONDS = 2.0
+
+_VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+class RegistryError(Exception):
+    pass
+
+def version_path(version, registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, version)
+
+def _current_path(registry_dir):
+    return os.path.join(registry_dir, CURRENT_FILE)
+
+# Daftar versi, terlama lebih dulu
+def list_versions(registry_dir=REGISTRY_DIR):
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = [name for name in os.listdir(registry_dir) if _VERSION_PATTERN.match(name)]
+    return sorted(versions, key=lambda name: int(name[1:]))
+
+def read_version_info(version, registry_dir=REGISTRY_DIR):
+    with open(os.path.join(version_path(version, registry_dir), VERSION_FILE)) as f:
+        return json.load(f)
+
+def current_version(registry_dir=REGISTRY_DIR):
+    try:
+        with open(_current_path(registry_dir)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+# Fungsi untuk mengaktifkan versi (juga dipakai untuk rollback). Penunjuk ditulis secara atomik,
+# sehingga pembaca selalu melihat versi lama atau versi baru.
+def set_current(version, registry_dir=REGISTRY_DIR):
+    if version not in list_versions(registry_dir):
+        raise RegistryError(f"Versi model tidak ditemukan: {version}")
+    atomic_write(_current_path(registry_dir), lambda f: f.write(version + '\n'), mode='w')
+
+# Fungsi untuk menyimpan model (dan tabel skor) sebagai versi baru yang tidak pernah diubah lagi.
+# Versi ditulis ke direktori sementara lalu di-rename ke nama versi berikutnya; jika dua proses
+# publish bersamaan, rename yang kalah mencoba nomor berikutnya.
+def publish_model(model, score_table=None, info=None, registry_dir=REGISTRY_DIR, activate=True,
+                  keep=MAX_VERSIONS):
+    os.makedirs(registry_dir, exist_ok=True)
+    tmp_path = os.path.join(registry_dir, f".tmp-{os.getpid()}")
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    manifest = write_model_artifact(model, tmp_path)
+    if score_table is not None:
+        os.makedirs(os.path.join(tmp_path, SCORE_TABLE_SUBDIR))
+        score_table.write(os.path.join(tmp_path, SCORE_TABLE_SUBDIR))
+
+    version_info = dict(info or {})
+    version_info.update(content_hash=manifest['content_hash'], created_at=manifest['created_at'])
+    while True:
+        versions = list_versions(registry_dir)
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+        version_info['version'] = version
+        with open(os.path.join(tmp_path, VERSION_FILE), 'w') as f:
+            json.dump(version_info, f, indent=2)
+        try:
+            os.rename(tmp_path, version_path(version, registry_dir))
+            break
+        except OSError:
+            if not os.path.exists(version_path(version, registry_dir)):
+                raise
+
+    if activate:
+        set_current(version, registry_dir)
+    prune_versions(registry_dir, keep)
+    return version_info
+
+# Fungsi untuk menghapus versi lama; versi aktif selalu disimpan. Proses yang masih memakai
+# array mmap dari versi yang dihapus tetap aman karena file yang sudah dibuka tidak hilang.
+def prune_versions(registry_dir=REGISTRY_DIR, keep=MAX_VERSIONS):
+    current = current_version(registry_dir)
+    old_versions = [v for v in list_versions(registry_dir) if v != current]
+    for version in old_versions[:max(0, len(old_versions) - keep + 1)]:
+        shutil.rmtree(version_path(version, registry_dir), ignore_errors=True)
+
+def load_version(version, registry_dir=REGISTRY_DIR, mmap=True):
+    model = load_model_artifact(version_path(version, registry_dir), mmap=mmap)
+    model.registry_version = version
+    return model
+
+# Fungsi untuk mencari path tabel skor milik model; None jika versi tidak punya tabel skor
+def score_table_path(model):
+    if model.artifact_path is None:
+        return None
+    path = os.path.join(model.artifact_path, SCORE_TABLE_SUBDIR)
+    return path if os.path.isdir(path) else None
+
+# Memegang model versi aktif untuk proses yang berjalan lama (Streamlit, scoring server).
+# get() memeriksa inode dan mtime file CURRENT paling sering sekali per check_interval; jika
+# berubah, versi baru dimuat lalu referensi model ditukar. Request yang sedang berjalan tetap
+# memakai objek model lama sampai selesai, jadi tidak ada request yang gagal saat pergantian.
+# Jika registry belum ada, `fallback()` dipakai (artifact/pickle lama).
+class ModelWatcher:
+    def __init__(self, registry_dir=REGISTRY_DIR, check_interval=CHECK_INTERVAL_SECONDS, fallback=None):
+        self.registry_dir = registry_dir
+        self.check_interval = check_interval
+        self.fallback = fallback
+        self.reloads = 0
+        self._model = None
+        self._pointer = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _pointer_state(self):
+        try:
+            stat = os.stat(_current_path(self.registry_dir))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def version(self):
+        return None if self._model is None else self._model.registry_version
+
+    def get(self):
+        if self._model is None or time.monotonic() >= self._next_check:
+            self.refresh()
+        return self._model
+
+    # Fungsi untuk memeriksa penunjuk sekarang (tanpa menunggu check_interval)
+    def refresh(self):
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            pointer = self._pointer_state()
+            if pointer == self._pointer and self._model is not None:
+                return self._model
+
+            version = current_version(self.registry_dir) if pointer is not None else None
+            try:
+                if version is not None:
+                    model = load_version(version, self.registry_dir)
+                elif self.fallback is not None:
+                    model = self.fallback()
+                else:
+                    raise RegistryError(f"Belum ada versi model aktif di {self.registry_dir}")
+            except Exception as e:
+                # Model lama tetap dipakai; penunjuk yang sama tidak dicoba ulang sampai berubah lagi
+                if self._model is None:
+                    raise
+                print(f"Gagal memuat model versi {version} ({e}), tetap memakai versi {self.version}")
+                self._pointer = pointer
+                return self._model
+
+            if self._model is not None:
+                print(f"Model reloaded: {self.version} -> {model.registry_version}")
+                self.reloads += 1
+            self._model = model
+            self._pointer = pointer
+            return model
+
+# ModelWatcher bersama untuk satu proses (dipakai app, halaman analisis, dan scoring server)
+@lru_cache(maxsize=None)
+def default_watcher():
+    from scripts.scoring import load_compiled_model
+    return ModelWatcher(fallback=load_compiled_model)
+
+def print_versions(registry_dir=REGISTRY_DIR):
+    current = current_version(registry_dir)
+    for version in list_versions(registry_dir):
+        info = read_version_info(version, registry_dir)
+        marker = '*' if version == current else ' '
+        metric = f"roc_auc {info['roc_auc']:.4f}" if info.get('roc_auc') is not None else ''
+        source = info.get('source', '')
+        if info.get('compaction'):
+            source += f" (compact from {info['compaction']['compacted_from']})"
+        print(f"{marker} {version}  {info['created_at']}  {info['content_hash'][:12]}  {source}  {metric}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kelola versi model di registry")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Tampilkan semua versi (* = aktif)")
+    activate_parser = subparsers.add_parser('activate', help="Aktifkan versi tertentu")
+    activate_parser.add_argument('version')
+    rollback_parser = subparsers.add_parser('rollback', help="Aktifkan versi sebelum versi aktif")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        print_versions(args.registry_dir)
+    elif args.command == 'activate':
+        set_current(args.version, args.registry_dir)
+        print(f"Versi aktif: {args.version}")
+    else:
+        versions = list_versions(args.registry_dir)
+        current = current_version(args.registry_dir)
+        if current not in versions or versions.index(current) == 0:
+            raise SystemExit("Tidak ada versi sebelumnya untuk rollback")
+        previous = versions[versions.index(current) - 1]
+        set_current(previous, args.registry_dir)
+        print(f"Rollback: {current} -> {previous}")
@@ -0,0 +1,173 @@
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+
+from scripts.compiled_model import compile_model
+from scripts.data_store import churn_labels, load_customer_data, model_features
+from scripts.model_artifact import artifact_nbytes
+from scripts.train_model import build_pipeline
+
+# Kandidat model yang dibandingkan. Semuanya hutan pohon keputusan agar tetap bisa dikompilasi
+# ke CompiledChurnModel, disimpan sebagai artifact, dan diperbarui incremental (warm_start).
+DEFAULT_CANDIDATES = [
+    {'name': 'rf-100-full', 'estimator': 'random_forest', 'n_estimators': 100, 'max_depth': None},
+    {'name': 'rf-50-full', 'estimator': 'random_forest', 'n_estimators': 50, 'max_depth': None},
+    {'name': 'rf-100-d12', 'estimator': 'random_forest', 'n_estimators': 100, 'max_depth': 12},
+    {'name': 'rf-50-d10', 'estimator': 'random_forest', 'n_estimators': 50, 'max_depth': 10},
+    {'name': 'rf-30-d8', 'estimator': 'random_forest', 'n_estimators': 30, 'max_depth': 8},
+    {'name': 'rf-20-d6', 'estimator': 'random_forest', 'n_estimators': 20, 'max_depth': 6},
+    {'name': 'et-100-d12', 'estimator': 'extra_trees', 'n_estimators': 100, 'max_depth': 12},
+    {'name': 'et-50-d10', 'estimator': 'extra_trees', 'n_estimators': 50, 'max_depth': 10},
+]
+
+ESTIMATORS = {
+    'random_forest': RandomForestClassifier,
+    'extra_trees': ExtraTreesClassifier,
+}
+
+# Kandidat dengan AUC sampai selisih ini dari AUC terbaik dianggap setara; di antara yang
+# setara dipilih yang latency-nya paling kecil
+DEFAULT_AUC_TOLERANCE = 0.002
+
+# Jumlah request satu baris dan ukuran batch untuk mengukur latency inference
+SINGLE_REQUESTS = 200
+WARMUP_REQUESTS = 20
+BATCH_SIZE = 1000
+
+# Fungsi untuk membuat Pipeline kandidat (preprocessor sama seperti train_churn_model)
+def build_candidate(spec, random_state=42, n_jobs=None):
+    model = build_pipeline(random_state=random_state, n_jobs=n_jobs)
+    classifier = ESTIMATORS[spec['estimator']](
+        n_estimators=spec['n_estimators'], max_depth=spec['max_depth'],
+        random_state=random_state, n_jobs=n_jobs,
+    )
+    model.set_params(classifier=classifier)
+    return model
+
+# Fungsi untuk mengukur latency inference model terkompilasi: p50/p95 satu baris (seperti
+# request ke scoring server) dan waktu per baris untuk batch BATCH_SIZE baris
+def measure_latency(compiled, X, single_requests=SINGLE_REQUESTS, batch_size=BATCH_SIZE):
+    columns = compiled.feature_columns
+    requests = [
+        {col: [value] for col, value in zip(columns, row)}
+        for row in X[columns].iloc[:single_requests].itertuples(index=False)
+    ]
+    # Pemanasan agar cache CPU dan alokasi pertama tidak ikut terukur
+    for features in requests[:WARMUP_REQUESTS]:
+        compiled.predict_proba(features)
+
+    singles = []
+    for features in requests:
+        started = time.perf_counter()
+        compiled.predict_proba(features)
+        singles.append(time.perf_counter() - started)
+
+    batch = {col: X[col].to_numpy()[:batch_size] for col in columns}
+    batch_timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        compiled.predict_proba(batch)
+        batch_timings.append(time.perf_counter() - started)
+
+    single_ms = np.asarray(singles) * 1000
+    n_batch = len(batch[columns[0]])
+    return {
+        'single_p50_ms': float(np.percentile(single_ms, 50)),
+        'single_p95_ms': float(np.percentile(single_ms, 95)),
+        'batch_us_per_row': float(np.median(batch_timings)) * 1e6 / n_batch,
+    }
+
+# Fungsi untuk melatih dan mengukur semua kandidat. Mengembalikan tabel tradeoff (satu dict per
+# kandidat) dan model yang sudah dilatih, dengan key nama kandidat.
+def evaluate_candidates(X_train, y_train, X_test, y_test, candidates=DEFAULT_CANDIDATES, n_jobs=1):
+    table = []
+    models = {}
+    for spec in candidates:
+        model = build_candidate(spec, n_jobs=n_jobs)
+        started = time.perf_counter()
+        with threadpool_limits(limits=n_jobs):
+            model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - started
+        model.named_steps['classifier'].set_params(n_jobs=None)
+
+        compiled = compile_model(model)
+        # AUC exact pada split test di memori: selisih antar kandidat dibandingkan dengan
+        # auc_tolerance yang kecil, lebih kecil dari batas error AUC histogram untuk daun tidak murni
+        roc_auc = roc_auc_score(y_test, compiled.predict_proba(X_test)[:, 1])
+        row = {
+            'name': spec['name'],
+            'estimator': spec['estimator'],
+            'n_estimators': spec['n_estimators'],
+            'max_depth': spec['max_depth'],
+            'roc_auc': float(roc_auc),
+            'fit_s': fit_s,
+            'n_nodes': int(len(compiled.feature)),
+            'size_mb': artifact_nbytes(compiled) / 1e6,
+            **measure_latency(compiled, X_test),
+        }
+        print(f"  {row['name']:<12} auc {row['roc_auc']:.4f}  p95 {row['single_p95_ms']:.3f} ms  "
+              f"batch {row['batch_us_per_row']:.2f} us/row  {row['size_mb']:.2f} MB")
+        table.append(row)
+        models[spec['name']] = model
+    return table, models
+
+# Fungsi untuk memilih kandidat terbaik dalam budget: di antara kandidat yang memenuhi semua
+# budget, ambil AUC tertinggi; kandidat lain dengan AUC dalam auc_tolerance dianggap setara dan
+# yang tercepat (p95 satu baris) dipilih. Jika tidak ada yang memenuhi budget, pilih yang tercepat.
+def choose_candidate(table, max_latency_ms=None, max_batch_us_per_row=None, max_size_mb=None,
+                     auc_tolerance=DEFAULT_AUC_TOLERANCE):
+    for row in table:
+        row['within_budget'] = (
+            (max_latency_ms is None or row['single_p95_ms'] <= max_latency_ms)
+            and (max_batch_us_per_row is None or row['batch_us_per_row'] <= max_batch_us_per_row)
+            and (max_size_mb is None or row['size_mb'] <= max_size_mb)
+        )
+
+    eligible = [row for row in table if row['within_budget']]
+    if not eligible:
+        fastest = min(table, key=lambda row: row['single_p95_ms'])
+        print(f"Warning: no candidate fits the budget, using the fastest ({fastest['name']})")
+        return fastest['name']
+
+    best_auc = max(row['roc_auc'] for row in eligible)
+    comparable = [row for row in eligible if row['roc_auc'] >= best_auc - auc_tolerance]
+    return min(comparable, key=lambda row: row['single_p95_ms'])['name']
+
+# Fungsi utama: latih semua kandidat, pilih satu dalam budget, dan kembalikan model terpilih
+# beserta laporan pemilihan (budget + tabel tradeoff) untuk disimpan di samping artifact
+def select_model(X_train, y_train, X_test, y_test, max_latency_ms=None, max_batch_us_per_row=None,
+                 max_size_mb=None, auc_tolerance=DEFAULT_AUC_TOLERANCE, candidates=DEFAULT_CANDIDATES, n_jobs=1):
+    print(f"Evaluating {len(candidates)} candidate models...")
+    table, models = evaluate_candidates(X_train, y_train, X_test, y_test, candidates, n_jobs)
+    selected = choose_candidate(table, max_latency_ms, max_batch_us_per_row, max_size_mb, auc_tolerance)
+    print(f"Selected model: {selected}")
+    selection = {
+        'selected': selected,
+        'budget': {
+            'max_latency_ms': max_latency_ms,
+            'max_batch_us_per_row': max_batch_us_per_row,
+            'max_size_mb': max_size_mb,
+            'auc_tolerance': auc_tolerance,
+        },
+        'candidates': table,
+    }
+    return models[selected], selection
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan AUC, latency, dan ukuran kandidat model (tanpa menyimpan model)")
+    parser.add_argument('--max-latency-ms', type=float, default=None, help="Budget p95 latency satu baris (ms)")
+    parser.add_argument('--max-batch-us-per-row', type=float, default=None, help="Budget waktu per baris pada batch (us)")
+    parser.add_argument('--max-size-mb', type=float, default=None, help="Budget ukuran artifact (MB)")
+    parser.add_argument('--auc-tolerance', type=float, default=DEFAULT_AUC_TOLERANCE)
+    args = parser.parse_args()
+
+    df = load_customer_data()
+    X_train, X_test, y_train, y_test = train_test_split(
+        model_features(df), churn_labels(df), test_size=0.2, random_state=42)
+    select_model(X_train, y_train, X_test, y_test, args.max_latency_ms, args.max_batch_us_per_row,
+                 args.max_size_mb, args.auc_tolerance)
@@ -0,0 +1,125 @@
+import os
+import shutil
+
+import numpy as np
+
+from scripts.data_store import (
+    PARQUET_PATH, churn_labels, dataset_fingerprint, open_parquet, row_group_fingerprints, to_frame,
+)
+from scripts.evaluation import ScoreHistogram
+from scripts.scoring import FEATURE_COLUMNS
+
+PREDICTION_CACHE_DIR = 'models/prediction_cache'
+
+# Jumlah model (content hash) yang cache-nya disimpan; cache model yang lebih lama dihapus
+MAX_CACHED_MODELS = 3
+
+# Versi format cache; dinaikkan jika cara menghitung probabilitas berubah untuk model yang sama
+# (versi 2: scaling float32 mengikuti StandardScaler untuk data Parquet bertipe)
+CACHE_VERSION = 2
+
+def _atomic_save(path, save):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        save(f)
+    os.replace(tmp_path, path)
+
+# Fungsi untuk menghitung metrik Performa Model dari histogram skor: kurva ROC, AUC
+# (dengan batas error-nya), confusion matrix pada threshold 0.5, dan feature importance
+def compute_performance(model, histogram):
+    fpr, tpr, thresholds = histogram.roc_curve()
+    return {
+        'fpr': fpr,
+        'tpr': tpr,
+        'thresholds': thresholds,
+        'auc': np.float64(histogram.auc()),
+        'auc_error': np.float64(histogram.auc_error_bound()),
+        'confusion_matrix': histogram.confusion_matrix(),
+        'feature_importances': np.asarray(model.feature_importances_),
+    }
+
+# Cache probabilitas dan metrik hasil scoring dataset di disk.
+# Kunci: content hash artifact model + fingerprint tiap row group data. Saat data berubah,
+# hanya row group yang fingerprint-nya berubah yang di-score ulang.
+class PredictionCache:
+    def __init__(self, model, path=PREDICTION_CACHE_DIR, max_models=MAX_CACHED_MODELS):
+        if model.content_hash is None:
+            raise ValueError("Model tanpa content hash tidak bisa di-cache; simpan artifact model terlebih dahulu")
+        self.model = model
+        self.path = path
+        self.max_models = max_models
+        self.model_dir = os.path.join(path, f"{model.content_hash}-v{CACHE_VERSION}")
+        self.rescored = 0
+
+    def _row_group_path(self, fingerprint):
+        return os.path.join(self.model_dir, f"rg-{fingerprint}.npy")
+
+    def _metrics_path(self, fingerprint):
+        return os.path.join(self.model_dir, f"metrics-{fingerprint}.npz")
+
+    # Fungsi untuk mengambil probabilitas churn per row group (dari cache atau dihitung),
+    # satu row group sekaligus
+    def iter_probabilities(self, data_path=PARQUET_PATH, fingerprints=None):
+        if fingerprints is None:
+            fingerprints = row_group_fingerprints(data_path)
+        os.makedirs(self.model_dir, exist_ok=True)
+        os.utime(self.model_dir)
+        parquet_file = open_parquet(data_path)
+
+        for i, fingerprint in enumerate(fingerprints):
+            cache_path = self._row_group_path(fingerprint)
+            if os.path.exists(cache_path):
+                yield i, np.load(cache_path)
+                continue
+            features = to_frame(parquet_file.read_row_group(i, columns=FEATURE_COLUMNS))
+            proba = self.model.predict_proba(features)[:, 1]
+            _atomic_save(cache_path, lambda f: np.save(f, proba))
+            self.rescored += 1
+            yield i, proba
+
+        self._prune(fingerprints)
+
+    # Fungsi untuk mengambil probabilitas churn seluruh dataset (dari cache atau dihitung)
+    def probabilities(self, data_path=PARQUET_PATH, fingerprints=None):
+        chunks = [proba for _, proba in self.iter_probabilities(data_path, fingerprints)]
+        return np.concatenate(chunks) if chunks else np.empty(0)
+
+    # Fungsi untuk mengambil metrik Performa Model dari cache, atau menghitung dan menyimpannya
+    def performance(self, data_path=PARQUET_PATH):
+        fingerprints = row_group_fingerprints(data_path)
+        metrics_path = self._metrics_path(dataset_fingerprint(fingerprints))
+        if os.path.exists(metrics_path):
+            with np.load(metrics_path) as metrics:
+                return {name: metrics[name] for name in metrics.files}
+
+        # Histogram skor diisi per row group, jadi memori tidak bergantung pada ukuran dataset
+        parquet_file = open_parquet(data_path)
+        histogram = ScoreHistogram()
+        for i, proba in self.iter_probabilities(data_path, fingerprints):
+            histogram.update(churn_labels(to_frame(parquet_file.read_row_group(i, columns=['churn']))), proba)
+        metrics = compute_performance(self.model, histogram)
+        _atomic_save(metrics_path, lambda f: np.savez(f, **metrics))
+        return metrics
+
+    # Hapus cache row group dan metrik yang tidak lagi cocok dengan data sekarang,
+    # serta cache model lama di luar max_models terbaru
+    def _prune(self, fingerprints):
+        keep = {os.path.basename(self._row_group_path(fp)) for fp in fingerprints}
+        keep.add(os.path.basename(self._metrics_path(dataset_fingerprint(fingerprints))))
+        for name in os.listdir(self.model_dir):
+            if name not in keep and '.tmp-' not in name:
+                os.remove(os.path.join(self.model_dir, name))
+
+        model_dirs = sorted(
+            (os.path.join(self.path, name) for name in os.listdir(self.path)),
+            key=os.path.getmtime, reverse=True,
+        )
+        for model_dir in model_dirs[self.max_models:]:
+            if model_dir != self.model_dir:
+                shutil.rmtree(model_dir, ignore_errors=True)
+
+    def info(self):
+        return {
+            'model_hash': self.model.content_hash,
+            'rescored_row_groups': self.rescored,
+        }
@@ -0,0 +1,111 @@
+import copy
+
+import numpy as np
+
+# Parameter akurasi sketch; k=200 memberi error rank sekitar 1.3% (lihat normalized_rank_error)
+DEFAULT_K = 200
+
+# Rasio kapasitas antar level compactor pada KLL
+CAPACITY_RATIO = 2 / 3
+
+# Sketch kuantil KLL (Karnin, Lang, Liberty 2016). Nilai disimpan dalam beberapa level
+# compactor; item di level h mewakili 2^h nilai asli. Ukuran sketch O(k log(n/k)),
+# tidak bergantung pada jumlah baris, dan dua sketch bisa digabung (merge) tanpa kehilangan
+# jaminan error. Min dan max disimpan secara exact.
+class KLLSketch:
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.min_ = np.inf
+        self.max_ = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * CAPACITY_RATIO ** depth)))
+
+    # Kompaksi satu level: item diurutkan, lalu setiap item kedua (offset acak) naik ke level
+    # berikutnya dengan bobot dua kali lipat
+    def _compact(self, level):
+        items = np.sort(self.levels[level])
+        keep = items[len(items) - len(items) % 2:]
+        items = items[:len(items) - len(items) % 2]
+        promoted = items[self._rng.integers(2)::2]
+        self.levels[level] = keep
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                self._compact(level)
+                # Kapasitas semua level berubah jika level baru ditambahkan; ulangi dari bawah
+                level = 0
+            else:
+                level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min_ = min(self.min_, float(values.min()))
+        self.max_ = max(self.max_, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min_ = min(self.min_, other.min_)
+        self.max_ = max(self.max_, other.max_)
+        self._compress()
+        return self
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    # Item yang tersimpan beserta bobotnya, terurut
+    def weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2 ** h, dtype=np.float64) for h, v in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    # Fungsi untuk menghitung kuantil (q di [0, 1]); q=0 dan q=1 menghasilkan min/max exact
+    def quantile(self, q):
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        items, weights = self.weighted_items()
+        cumulative = np.cumsum(weights)
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        result = items[np.clip(index, 0, len(items) - 1)]
+        result = np.where(q <= 0, self.min_, np.where(q >= 1, self.max_, result))
+        return result if result.ndim else float(result)
+
+    # Fungsi untuk memperkirakan proporsi nilai <= value
+    def rank(self, value):
+        if self.n == 0:
+            return np.nan
+        items, weights = self.weighted_items()
+        return float(weights[items <= value].sum() / weights.sum())
+
+    # Perkiraan error rank (normalisasi, confidence 99%) untuk satu kuantil,
+    # memakai konstanta empiris KLL dari Apache DataSketches
+    @property
+    def normalized_rank_error(self):
+        return 2.296 / self.k ** 0.9723
+
+    def __len__(self):
+        return sum(len(v) for v in self.levels)
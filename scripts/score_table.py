@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+from functools import lru_cache
+
+import numpy as np
+
+from scripts.atomic_io import swap_directory
+
+SCORE_TABLE_DIR = 'models/score_table'
+
+# Grid input yang sama dengan form prediksi di app.py: (start, stop, step) inklusif.
+# Step yang lebih besar menghasilkan versi "bucketed" yang lebih kecil; nilai di luar grid
+# tetap dijawab lewat model (dengan cache LRU).
+DEFAULT_GRID = {
+    'age': (18, 80, 1),
+    'purchase_amount': (0, 2000000000, 100000),
+    'tenure': (1, 120, 1),
+}
+
+# Ukuran cache LRU untuk input di luar grid
+OFF_GRID_CACHE_SIZE = 4096
+
+def _grid_values(spec):
+    start, stop, step = spec
+    return start + step * np.arange(int((stop - start) // step) + 1, dtype=np.float64)
+
+# Fungsi untuk mencari indeks nilai pada grid, atau None jika nilai di luar grid
+def _grid_position(value, spec):
+    start, stop, step = spec
+    if value < start or value > stop:
+        return None
+    position = (value - start) / step
+    if position != int(position):
+        return None
+    return int(position)
+
+# Fungsi untuk mengelompokkan nilai grid yang pasti menghasilkan keputusan yang sama di semua pohon.
+# Dua nilai setara jika jumlah threshold (untuk fitur tersebut) yang lebih kecil dari nilainya sama.
+def _compress_axis(model, feature, values):
+    j = model.numeric_features.index(feature)
+    transformed = ((values - model.mean[j]) / model.scale[j]).astype(np.float32)
+
+    is_split = (np.asarray(model.feature) == j) & np.isfinite(model.threshold)
+    thresholds = np.unique(np.asarray(model.threshold)[is_split])
+    codes = np.searchsorted(thresholds, transformed, side='left')
+
+    unique_codes, first_index, axis_index = np.unique(codes, return_index=True, return_inverse=True)
+    return axis_index.astype(np.int32), transformed[first_index]
+
+# Tabel probabilitas churn untuk seluruh grid input, disimpan dalam bentuk terkompresi per sumbu.
+class ScoreTable:
+    def __init__(self, grid, categories, axis_index, table, model_hash):
+        self.grid = {name: tuple(spec) for name, spec in grid.items()}
+        self.categories = list(categories)
+        self.axis_index = axis_index
+        self.table = table
+        self.model_hash = model_hash
+
+    @classmethod
+    def build(cls, model, grid=None, dtype=np.float32, predict_transformed=None):
+        grid = dict(DEFAULT_GRID if grid is None else grid)
+        if predict_transformed is None:
+            predict_transformed = model.predict_proba_transformed
+
+        axis_index = {}
+        representatives = {}
+        for feature in model.numeric_features:
+            axis_index[feature], representatives[feature] = _compress_axis(
+                model, feature, _grid_values(grid[feature])
+            )
+
+        # Bentuk matriks fitur (sudah ditransformasi) untuk seluruh kombinasi representatif,
+        # urutan sumbu tabel: fitur numerik lalu kategori
+        numeric = np.meshgrid(*[representatives[f] for f in model.numeric_features], indexing='ij')
+        numeric = np.column_stack([axis.ravel() for axis in numeric])
+        encoded = np.array(
+            [[float(category == c) for c in model.encoded_categories] for category in model.categories],
+            dtype=np.float32,
+        ).reshape(len(model.categories), len(model.encoded_categories))
+        X = np.hstack([
+            np.repeat(numeric, len(model.categories), axis=0),
+            np.tile(encoded, (len(numeric), 1)),
+        ]).astype(np.float32)
+
+        proba = predict_transformed(X)[:, 1]
+        table = proba.astype(dtype)
+        # Pembulatan ke dtype yang lebih kecil tidak boleh mengubah label pada threshold 0.5
+        flipped = (proba < 0.5) & (table >= 0.5)
+        table[flipped] = np.nextafter(dtype(0.5), dtype(0))
+
+        shape = [len(representatives[f]) for f in model.numeric_features] + [len(model.categories)]
+        return cls(grid, model.categories, axis_index, table.reshape(shape), model.content_hash)
+
+    @property
+    def numeric_features(self):
+        return list(self.axis_index)
+
+    # Fungsi untuk mengambil probabilitas dari tabel, None jika input di luar grid
+    def lookup(self, age, gender, purchase_amount, tenure):
+        values = {'age': age, 'purchase_amount': purchase_amount, 'tenure': tenure}
+        index = []
+        for feature in self.numeric_features:
+            position = _grid_position(values[feature], self.grid[feature])
+            if position is None:
+                return None
+            index.append(self.axis_index[feature][position])
+        if gender not in self.categories:
+            return None
+        index.append(self.categories.index(gender))
+        return float(self.table[tuple(index)])
+
+    # Fungsi untuk menulis tabel ke direktori `path` yang sudah ada (tidak atomik)
+    def write(self, path):
+        np.save(os.path.join(path, 'table.npy'), self.table)
+        for feature, index in self.axis_index.items():
+            np.save(os.path.join(path, f"{feature}_index.npy"), index)
+        manifest = {
+            'model_hash': self.model_hash,
+            'grid': {name: list(spec) for name, spec in self.grid.items()},
+            'categories': self.categories,
+            'numeric_features': self.numeric_features,
+            'dtype': self.table.dtype.str,
+            'shape': list(self.table.shape),
+        }
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    def save(self, path=SCORE_TABLE_DIR):
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        self.write(tmp_path)
+        swap_directory(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=SCORE_TABLE_DIR):
+        path = os.path.realpath(path)
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        axis_index = {
+            feature: np.load(os.path.join(path, f"{feature}_index.npy"))
+            for feature in manifest['numeric_features']
+        }
+        table = np.load(os.path.join(path, 'table.npy'), mmap_mode='r')
+        return cls(manifest['grid'], manifest['categories'], axis_index, table, manifest['model_hash'])
+
+
+# Fungsi untuk memuat tabel skor, dan membangun ulang jika belum ada, grid berbeda,
+# atau dibuat dari model lain (dibandingkan lewat content hash artifact)
+def load_or_build_score_table(model, path=SCORE_TABLE_DIR, grid=None, dtype=np.float32):
+    grid = dict(DEFAULT_GRID if grid is None else grid)
+    if os.path.exists(os.path.join(path, 'manifest.json')):
+        table = ScoreTable.load(path)
+        same_grid = table.grid == {name: tuple(spec) for name, spec in grid.items()}
+        if model.content_hash is not None and table.model_hash == model.content_hash and same_grid:
+            return table
+
+    table = ScoreTable.build(model, grid=grid, dtype=dtype)
+    if model.content_hash is not None:
+        table.save(path)
+    return table
+
+
+# Scorer satu pelanggan: lookup O(1) ke tabel untuk input di grid,
+# selain itu dihitung dengan model dan disimpan di cache LRU berukuran terbatas
+class TableScorer:
+    def __init__(self, model, table, cache_size=OFF_GRID_CACHE_SIZE):
+        self.model = model
+        self.table = table
+        self._score_off_grid = lru_cache(maxsize=cache_size)(self._score_with_model)
+
+    def _score_with_model(self, age, gender, purchase_amount, tenure):
+        proba = self.model.predict_proba({
+            'age': [age],
+            'gender': [gender],
+            'purchase_amount': [purchase_amount],
+            'tenure': [tenure],
+        })
+        return float(proba[0, 1])
+
+    def predict_proba_one(self, age, gender, purchase_amount, tenure):
+        probability = self.table.lookup(age, gender, purchase_amount, tenure)
+        if probability is None:
+            probability = self._score_off_grid(age, gender, purchase_amount, tenure)
+        return probability
+
+    def cache_info(self):
+        return self._score_off_grid.cache_info()
@@ -0,0 +1,138 @@
+import argparse
+import os
+import pickle
+from collections.abc import Mapping
+
+import numpy as np
+
+from scripts.compiled_model import CompiledChurnModel, compile_model, is_dataframe
+from scripts.metrics import increment, timer
+from scripts.model_artifact import ARTIFACT_DIR, MANIFEST_FILE, ModelArtifactError, load_model_artifact
+from scripts.model_registry import REGISTRY_DIR, current_version, load_version
+
+MODEL_PATH = 'models/churn_model.pkl'
+
+# Urutan kolom harus sama seperti data training
+FEATURE_COLUMNS = ['age', 'gender', 'purchase_amount', 'tenure']
+NUMERIC_FEATURES = ['age', 'purchase_amount', 'tenure']
+
+# Fungsi untuk memuat model dari file pickle
+def load_churn_model(path=MODEL_PATH):
+    with open(path, 'rb') as file:
+        model = pickle.load(file)
+    return model
+
+# Fungsi untuk memuat CompiledChurnModel. Versi aktif di registry diutamakan, lalu artifact
+# lama (manifest + array mmap), dan file pickle sebagai fallback terakhir.
+def load_compiled_model(artifact_path=ARTIFACT_DIR, pickle_path=MODEL_PATH, registry_dir=REGISTRY_DIR):
+    with timer('load', component='model'):
+        return _load_compiled_model(artifact_path, pickle_path, registry_dir)
+
+def _load_compiled_model(artifact_path, pickle_path, registry_dir):
+    version = current_version(registry_dir)
+    if version is not None:
+        try:
+            return load_version(version, registry_dir)
+        except (ModelArtifactError, OSError) as e:
+            print(f"Model versi {version} tidak valid ({e}), memakai {artifact_path}")
+    if os.path.exists(os.path.join(artifact_path, MANIFEST_FILE)):
+        try:
+            return load_model_artifact(artifact_path)
+        except ModelArtifactError as e:
+            print(f"Artifact model tidak valid ({e}), memakai {pickle_path}")
+    return compile_model(load_churn_model(pickle_path))
+
+# Fungsi untuk memvalidasi input (DataFrame atau dict berisi array) dan memilih kolom fitur
+def to_feature_frame(data):
+    if is_dataframe(data):
+        missing = [col for col in FEATURE_COLUMNS if col not in data.columns]
+        if missing:
+            raise ValueError(f"Kolom tidak ditemukan pada data input: {missing}")
+        return data[FEATURE_COLUMNS]
+
+    if isinstance(data, Mapping):
+        missing = [col for col in FEATURE_COLUMNS if col not in data]
+        if missing:
+            raise ValueError(f"Kolom tidak ditemukan pada data input: {missing}")
+        return {col: np.atleast_1d(data[col]) for col in FEATURE_COLUMNS}
+
+    raise TypeError(
+        "Data input harus berupa DataFrame atau dict berisi array "
+        f"dengan kolom {FEATURE_COLUMNS}, bukan {type(data).__name__}"
+    )
+
+# Fungsi untuk memprediksi satu batch dalam satu panggilan predict_proba
+def _predict_frame(model, features, threshold):
+    if len(features[FEATURE_COLUMNS[0]]) == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=float)
+
+    # CompiledChurnModel bisa langsung memakai dict berisi array, Pipeline butuh DataFrame
+    if isinstance(model, CompiledChurnModel):
+        probabilities = model.predict_proba(features)[:, 1]
+    else:
+        if isinstance(features, Mapping):
+            with timer('dataframe', component='scoring'):
+                import pandas as pd
+                features = pd.DataFrame(features)
+        with timer('predict', component='pipeline'):
+            probabilities = model.predict_proba(features)[:, 1]
+    predictions = (probabilities >= threshold).astype(int)
+
+    increment('churn_predicted_rows_total', len(probabilities))
+    increment('churn_prediction_batches_total')
+    return predictions, probabilities
+
+# Fungsi untuk memprediksi setiap chunk dari iterator secara berurutan (streaming)
+def iter_predict_churn_batch(chunks, model=None, threshold=0.5):
+    if model is None:
+        model = load_churn_model()
+
+    for chunk in chunks:
+        yield _predict_frame(model, to_feature_frame(chunk), threshold)
+
+# Fungsi untuk memprediksi churn banyak pelanggan sekaligus.
+# `data` dapat berupa DataFrame, dict berisi array per kolom, atau iterator of chunks
+# (misalnya hasil pd.read_csv(..., chunksize=...)). Hasilnya (predictions, probabilities).
+def predict_churn_batch(data, model=None, threshold=0.5):
+    if model is None:
+        model = load_churn_model()
+
+    if is_dataframe(data) or isinstance(data, Mapping):
+        return _predict_frame(model, to_feature_frame(data), threshold)
+
+    predictions = []
+    probabilities = []
+    for chunk_predictions, chunk_probabilities in iter_predict_churn_batch(data, model, threshold):
+        predictions.append(chunk_predictions)
+        probabilities.append(chunk_probabilities)
+
+    if not probabilities:
+        return np.empty(0, dtype=int), np.empty(0, dtype=float)
+    return np.concatenate(predictions), np.concatenate(probabilities)
+
+# Fungsi untuk menilai file CSV besar per chunk dan menulis hasilnya ke CSV baru
+def score_csv(input_path, output_path, chunksize=100000, model_path=MODEL_PATH, threshold=0.5):
+    model = load_churn_model(model_path)
+    n_rows = 0
+
+    import pandas as pd
+    reader = pd.read_csv(input_path, chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        predictions, probabilities = predict_churn_batch(chunk, model=model, threshold=threshold)
+        chunk = chunk.assign(churn_probability=probabilities, churn_prediction=predictions)
+        chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        n_rows += len(chunk)
+
+    print(f"Scored {n_rows} customers and saved to {output_path}")
+    return n_rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch scoring churn pelanggan dari file CSV")
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    score_csv(args.input_path, args.output_path, args.chunksize, args.model_path, args.threshold)
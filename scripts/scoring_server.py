@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+from scripts.metrics import METRICS, PROFILING_ENABLED, STAGE_METRIC, observe, profiled, timer
+from scripts.model_registry import ModelWatcher, default_watcher
+from scripts.scoring import FEATURE_COLUMNS, NUMERIC_FEATURES, predict_churn_batch, to_feature_frame
+
+DEFAULT_PORT = 8888
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Jumlah sampel terakhir yang disimpan untuk menghitung statistik latency
+STATS_WINDOW = 10000
+
+_MEMORY_LINE = re.compile(r'^(Rss|Pss|Shared_Clean|Private_Clean|Private_Dirty):\s+(\d+) kB')
+
+# Fungsi untuk membaca pemakaian memori proses ini (MB) dari /proc/self/smaps_rollup (Linux).
+# PSS membagi page yang dipakai bersama, misalnya array model mmap, dengan jumlah proses
+# yang memakainya; None jika tidak tersedia.
+def process_memory():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    memory = {}
+    for line in lines:
+        match = _MEMORY_LINE.match(line)
+        if match:
+            memory[f"{match.group(1).lower()}_mb"] = int(match.group(2)) / 1024
+    return memory
+
+# Statistik ukuran batch dan waktu tunggu di antrean
+class BatchStats:
+    def __init__(self, window=STATS_WINDOW):
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.batch_sizes = deque(maxlen=window)
+        self.queue_latency_ms = deque(maxlen=window)
+        self.predict_ms = deque(maxlen=window)
+
+    def record_batch(self, n_rows, queue_latencies_ms, predict_ms):
+        self.batches += 1
+        self.rows += n_rows
+        self.batch_sizes.append(n_rows)
+        self.queue_latency_ms.extend(queue_latencies_ms)
+        self.predict_ms.append(predict_ms)
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return {'count': 0}
+        array = np.fromiter(values, dtype=float)
+        return {
+            'count': len(array),
+            'mean': float(array.mean()),
+            'p50': float(np.percentile(array, 50)),
+            'p95': float(np.percentile(array, 95)),
+            'p99': float(np.percentile(array, 99)),
+            'max': float(array.max()),
+        }
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'batch_size': self._summary(self.batch_sizes),
+            'queue_latency_ms': self._summary(self.queue_latency_ms),
+            'predict_ms': self._summary(self.predict_ms),
+        }
+
+# Mengumpulkan request yang datang bersamaan menjadi micro-batch, lalu menjalankan
+# satu predict_proba per batch. Batch dikirim saat mencapai max_batch_size baris
+# atau saat request tertua sudah menunggu max_wait_ms. `model` boleh berupa ModelWatcher:
+# versi model aktif diperiksa sekali per batch, dan satu batch selalu memakai satu versi.
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchStats()
+        self._queue = None
+        self._worker = None
+        # Prediksi dijalankan di thread terpisah agar event loop tetap menerima request
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def current_model(self):
+        return self.model.get() if isinstance(self.model, ModelWatcher) else self.model
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    # Fungsi untuk memasukkan satu request (dict berisi array per kolom) ke antrean
+    async def submit(self, features):
+        self.start()
+        self.stats.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, len(features[FEATURE_COLUMNS[0]]), time.perf_counter(), future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        n_rows = batch[0][1]
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += item[1]
+        return batch, n_rows
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, n_rows = await self._collect()
+            started = time.perf_counter()
+            queue_latencies = [(started - enqueued) * 1000 for _, _, enqueued, _ in batch]
+            for latency_ms in queue_latencies:
+                observe(STAGE_METRIC, latency_ms / 1000, stage='queue', component='server')
+            model = self.current_model()
+
+            try:
+                features = {
+                    col: np.concatenate([item[0][col] for item in batch]) for col in FEATURE_COLUMNS
+                }
+                predictions, probabilities = await loop.run_in_executor(
+                    self._executor, predict_churn_batch, features, model
+                )
+            except Exception:
+                # Satu request yang tidak valid tidak boleh menggagalkan request lain di batch
+                await self._predict_individually(batch, model)
+                continue
+
+            self.stats.record_batch(n_rows, queue_latencies, (time.perf_counter() - started) * 1000)
+            offset = 0
+            for _, size, _, future in batch:
+                if not future.done():
+                    future.set_result((predictions[offset:offset + size], probabilities[offset:offset + size]))
+                offset += size
+
+    async def _predict_individually(self, batch, model):
+        loop = asyncio.get_running_loop()
+        for features, _, _, future in batch:
+            try:
+                result = await loop.run_in_executor(
+                    self._executor, predict_churn_batch, features, model
+                )
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.stats.errors += 1
+                if not future.done():
+                    future.set_exception(e)
+
+
+# Fungsi untuk mengubah body JSON menjadi dict berisi array per kolom
+def parse_customers(body):
+    payload = json.loads(body)
+    if isinstance(payload, dict) and 'customers' in payload:
+        customers = payload['customers']
+    else:
+        customers = [payload]
+    if not isinstance(customers, list) or not customers or not all(isinstance(c, dict) for c in customers):
+        raise ValueError("Body harus berupa objek pelanggan atau {\"customers\": [...]}")
+
+    present = [col for col in FEATURE_COLUMNS if all(col in c for c in customers)]
+    for i, customer in enumerate(customers):
+        for col in present:
+            if not _valid_value(col, customer[col]):
+                kind = "angka finite" if col in NUMERIC_FEATURES else "string"
+                raise ValueError(f"customers[{i}].{col} harus berupa {kind}, bukan {json.dumps(customer[col])}")
+    return to_feature_frame({col: [c[col] for c in customers] for col in present})
+
+# Fitur numerik harus int/float finite (bool dan null ditolak), fitur kategorikal harus string
+def _valid_value(col, value):
+    if col in NUMERIC_FEATURES:
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    return isinstance(value, str)
+
+
+class PredictHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher):
+        self.batcher = batcher
+
+    # Body JSON: satu pelanggan {"age": .., "gender": .., ...} atau {"customers": [{...}, ...]}.
+    # Dengan ?profile=1 (dan CHURN_PROFILING=1) request diprediksi langsung di luar micro-batch
+    # dengan cProfile, dan path file profil dikembalikan di response.
+    async def post(self):
+        with timer('request', component='server'):
+            try:
+                features = parse_customers(self.request.body)
+            except (ValueError, TypeError) as e:
+                self.set_status(400)
+                self.write({'error': str(e)})
+                return
+
+            profile = None
+            try:
+                if PROFILING_ENABLED and self.get_query_argument('profile', None) == '1':
+                    with profiled('predict') as profile:
+                        predictions, probabilities = predict_churn_batch(features, self.batcher.current_model())
+                else:
+                    predictions, probabilities = await self.batcher.submit(features)
+            except (ValueError, TypeError) as e:
+                self.set_status(400)
+                self.write({'error': str(e)})
+                return
+
+            response = {
+                'predictions': predictions.tolist(),
+                'probabilities': probabilities.tolist(),
+            }
+            if profile is not None:
+                response['profile'] = profile['path']
+            self.write(response)
+
+
+class StatsHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher):
+        self.batcher = batcher
+
+    def get(self):
+        stats = self.batcher.stats.to_dict()
+        model = self.batcher.current_model()
+        stats['model'] = {'version': getattr(model, 'registry_version', None),
+                          'content_hash': getattr(model, 'content_hash', None)}
+        stats['worker'] = {'id': self.application.worker_id, 'pid': os.getpid()}
+        stats['memory'] = process_memory()
+        self.write(stats)
+
+
+# Metrik instrumentasi: format teks Prometheus, atau JSON dengan ?format=json
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        if self.get_query_argument('format', None) == 'json':
+            self.write(METRICS.to_dict())
+            return
+        self.set_header('Content-Type', 'text/plain; version=0.0.4')
+        self.write(METRICS.to_prometheus())
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({'status': 'ok', 'worker': self.application.worker_id, 'pid': os.getpid()})
+
+
+# Fungsi untuk membuat aplikasi tornado; bisa dipakai langsung oleh
+# tornado.testing.AsyncHTTPTestCase untuk pengujian lokal in-process. Tanpa `model`, server
+# memakai versi aktif di registry dan memuat versi baru otomatis (hot reload).
+def make_app(model=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, worker_id=None):
+    if model is None:
+        model = default_watcher()
+        model.get()
+    batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    app = tornado.web.Application([
+        (r'/predict', PredictHandler, {'batcher': batcher}),
+        (r'/stats', StatsHandler, {'batcher': batcher}),
+        (r'/metrics', MetricsHandler),
+        (r'/health', HealthHandler),
+    ])
+    app.batcher = batcher
+    app.worker_id = worker_id
+    return app
+
+
+async def serve(port=DEFAULT_PORT, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                sockets=None, worker_id=None):
+    app = make_app(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, worker_id=worker_id)
+    if sockets is None:
+        app.listen(port)
+    else:
+        tornado.httpserver.HTTPServer(app).add_sockets(sockets)
+    worker = '' if worker_id is None else f"worker {worker_id} (pid {os.getpid()}) "
+    print(f"Scoring server {worker}listening on port {port} "
+          f"(max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+    await asyncio.Event().wait()
+
+
+# Fungsi untuk menjalankan server dengan beberapa proses worker. Proses induk membuka socket dan
+# memuat model sekali (array artifact di-mmap read-only), lalu fork n_workers worker yang berbagi
+# socket tersebut; kernel membagi koneksi ke worker yang sedang menunggu. Page model dipakai
+# bersama oleh semua worker, sehingga memori per worker tidak bertambah dengan ukuran model.
+# Saat versi model berganti, setiap worker me-mmap versi baru dari file yang sama. Proses induk
+# hanya mengawasi worker dan menjalankan ulang worker yang mati.
+def serve_workers(port=DEFAULT_PORT, n_workers=0, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                  max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    sockets = tornado.netutil.bind_sockets(port)
+    model = default_watcher().get()
+    n_workers = n_workers or tornado.process.cpu_count()
+    print(f"Model {getattr(model, 'registry_version', None)} loaded in parent process {os.getpid()}, "
+          f"forking {n_workers} workers")
+    worker_id = tornado.process.fork_processes(n_workers)
+    asyncio.run(serve(port, max_batch_size, max_wait_ms, sockets=sockets, worker_id=worker_id))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server HTTP untuk scoring churn dengan micro-batching")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Jumlah proses worker yang berbagi satu model (0 = jumlah core)")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Aktifkan instrumentasi (endpoint /metrics), sama dengan CHURN_METRICS=1")
+    parser.add_argument('--metrics-log', default=None, help="Tulis setiap pengukuran sebagai baris JSON ke file ini")
+    args = parser.parse_args()
+
+    if args.metrics or args.metrics_log:
+        METRICS.enable(log_path=args.metrics_log)
+
+    if args.workers == 1:
+        asyncio.run(serve(args.port, args.max_batch_size, args.max_wait_ms))
+    else:
+        serve_workers(args.port, args.workers, args.max_batch_size, args.max_wait_ms)
@@ -0,0 +1,114 @@
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+
+STARTUP_REPORT_PATH = 'models/startup_report.json'
+
+# Modul yang diimpor app.py per halaman. 'base' selalu diimpor saat script dijalankan,
+# modul halaman lain baru diimpor ketika halaman tersebut dibuka.
+PAGE_IMPORTS = {
+    'base': ['streamlit'],
+    'Prediksi Churn': ['scripts.scoring', 'scripts.score_table', 'scripts.figure_cache'],
+    'Prediksi Batch': ['scripts.batch_scoring'],
+    'Analisis Data': ['scripts.analysis'],
+    'Persiapan Data & Model': ['scripts.data_store', 'scripts.generate_dummy_data', 'scripts.train_model'],
+}
+
+# Regresi dilaporkan jika waktu import naik lebih dari 20% dan lebih dari 50 ms
+REGRESSION_RATIO = 0.2
+REGRESSION_MIN_MS = 50.0
+
+_MARKER = '--startup-profile-start--'
+
+# Fungsi untuk mengukur waktu import modul di interpreter baru (cold start) memakai
+# `python -X importtime`. Modul `preloaded` diimpor dulu dan tidak ikut dihitung, sehingga
+# yang terukur hanya biaya tambahan untuk halaman tersebut.
+def measure_imports(modules, preloaded=()):
+    code = '\n'.join(
+        [f"import {name}" for name in preloaded]
+        + [f"import sys; sys.stderr.write({_MARKER!r} + '\\n')"]
+        + [f"import {name}" for name in modules]
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import gagal: {result.stderr.strip().splitlines()[-1]}")
+
+    lines = result.stderr.split(_MARKER, 1)[1].splitlines()
+    records = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        records.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+    total_ms = sum(r['cumulative_ms'] for r in records if r['depth'] == 0)
+    return {'total_ms': total_ms, 'modules': records}
+
+# Fungsi untuk membuat laporan waktu import per halaman
+def startup_report(pages=None):
+    pages = [p for p in PAGE_IMPORTS if p != 'base'] if pages is None else pages
+    report = {'python': sys.version.split()[0], 'pages': {}}
+    report['pages']['base'] = measure_imports(PAGE_IMPORTS['base'])
+    for page in pages:
+        report['pages'][page] = measure_imports(PAGE_IMPORTS[page], preloaded=PAGE_IMPORTS['base'])
+    return report
+
+def print_report(report, top=10):
+    for page, result in report['pages'].items():
+        print(f"{page}: {result['total_ms']:.1f} ms")
+        slowest = sorted(result['modules'], key=lambda r: r['self_ms'], reverse=True)[:top]
+        for record in slowest:
+            print(f"  {record['self_ms']:9.1f} ms self {record['cumulative_ms']:9.1f} ms cumulative  {record['module']}")
+
+# Fungsi untuk membandingkan laporan dengan baseline; mengembalikan daftar halaman yang melambat
+def find_regressions(report, baseline, ratio=REGRESSION_RATIO, min_ms=REGRESSION_MIN_MS):
+    regressions = []
+    for page, result in report['pages'].items():
+        if page not in baseline['pages']:
+            continue
+        before = baseline['pages'][page]['total_ms']
+        after = result['total_ms']
+        if after - before > min_ms and after > before * (1 + ratio):
+            regressions.append((page, before, after))
+    return regressions
+
+# Fungsi untuk mengimpor modul halaman lebih awal (warm-up) di proses yang sedang berjalan
+def warm_imports(pages=None):
+    pages = list(PAGE_IMPORTS) if pages is None else pages
+    for page in pages:
+        for name in PAGE_IMPORTS[page]:
+            importlib.import_module(name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laporan waktu import (cold start) per halaman aplikasi")
+    parser.add_argument('--page', action='append', choices=[p for p in PAGE_IMPORTS if p != 'base'],
+                        help="Halaman yang diukur (default: semua)")
+    parser.add_argument('--top', type=int, default=10, help="Jumlah modul paling lambat per halaman")
+    parser.add_argument('--output', default=None, help=f"Simpan laporan JSON (misalnya {STARTUP_REPORT_PATH})")
+    parser.add_argument('--baseline', default=None,
+                        help="Bandingkan dengan laporan JSON sebelumnya; exit code 1 jika ada regresi")
+    args = parser.parse_args()
+
+    report = startup_report(args.page)
+    print_report(report, args.top)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f))
+        for page, before, after in regressions:
+            print(f"REGRESSION {page}: {before:.1f} ms -> {after:.1f} ms")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,297 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from scripts.data_store import (
+    PARQUET_PATH, ROW_GROUP_SIZE, iter_customer_data, open_parquet, row_group_fingerprints, to_frame,
+)
+from scripts.quantile_sketch import KLLSketch
+
+# Ringkasan per row group disimpan di sini, dengan fingerprint row group sebagai nama file
+SUMMARY_CACHE_DIR = 'models/summary_cache'
+
+# Kolom numerik yang diringkas; gender dikodekan Female=1, Male=0 untuk korelasi
+NUMERIC_COLUMNS = ['age', 'purchase_amount', 'tenure', 'churn']
+CORRELATION_COLUMNS = ['age', 'gender', 'purchase_amount', 'tenure', 'churn']
+
+# Kolom yang distribusinya diringkas dengan sketch kuantil, per kelas churn
+SKETCH_COLUMNS = ['age', 'purchase_amount', 'tenure']
+
+# Akumulator count, mean, variance, min/max, dan kovarians untuk beberapa kolom sekaligus.
+# Setiap chunk diringkas sekali, lalu digabung dengan rumus paralel Welford/Chan,
+# sehingga hasilnya stabil secara numerik dan bisa digabung antar worker.
+class RunningStats:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = 0
+        self.mean_ = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+        self.min_ = np.full(k, np.inf)
+        self.max_ = np.full(k, -np.inf)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        if len(values) == 0:
+            return self
+        chunk = RunningStats(self.columns)
+        chunk.count = len(values)
+        chunk.mean_ = values.mean(axis=0)
+        centered = values - chunk.mean_
+        chunk.comoment = centered.T @ centered
+        chunk.min_ = values.min(axis=0)
+        chunk.max_ = values.max(axis=0)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        n = self.count + other.count
+        delta = other.mean_ - self.mean_
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.count * other.count / n)
+        self.mean_ = self.mean_ + delta * (other.count / n)
+        self.min_ = np.minimum(self.min_, other.min_)
+        self.max_ = np.maximum(self.max_, other.max_)
+        self.count = n
+        return self
+
+    @property
+    def mean(self):
+        return pd.Series(self.mean_, index=self.columns)
+
+    # Variance dan std sampel (ddof=1), sama seperti pandas
+    @property
+    def variance(self):
+        ddof = 1 if self.count > 1 else 0
+        return pd.Series(np.diag(self.comoment) / max(self.count - ddof, 1), index=self.columns)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def covariance(self):
+        return pd.DataFrame(self.comoment / max(self.count - 1, 1), index=self.columns, columns=self.columns)
+
+    @property
+    def correlation(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+# Akumulator jumlah baris dan jumlah churn per grup (misalnya per gender)
+class GroupRates:
+    def __init__(self):
+        self.counts = {}
+        self.positives = {}
+
+    def update(self, keys, values):
+        groups, inverse = np.unique(np.asarray(keys), return_inverse=True)
+        return self.update_codes(inverse, groups.tolist(), values)
+
+    # Update dari kode grup (misalnya kode kolom categorical): codes[i] adalah indeks ke `groups`
+    def update_codes(self, codes, groups, values):
+        counts = np.bincount(codes, minlength=len(groups))
+        positives = np.bincount(codes, weights=np.asarray(values, dtype=np.float64), minlength=len(groups))
+        for group, count, positive in zip(groups, counts, positives):
+            if count == 0:
+                continue
+            self.counts[group] = self.counts.get(group, 0) + int(count)
+            self.positives[group] = self.positives.get(group, 0) + int(positive)
+        return self
+
+    def merge(self, other):
+        for group, count in other.counts.items():
+            self.counts[group] = self.counts.get(group, 0) + count
+            self.positives[group] = self.positives.get(group, 0) + other.positives[group]
+        return self
+
+    def rates(self):
+        groups = sorted(self.counts)
+        return pd.Series([self.positives[g] / self.counts[g] for g in groups], index=groups)
+
+# Ringkasan data pelanggan yang dihitung dalam satu pass per chunk: statistik deskriptif,
+# distribusi churn, korelasi, churn rate per gender, dan sketch kuantil per kelas churn
+class CustomerSummary:
+    def __init__(self):
+        self.stats = RunningStats(CORRELATION_COLUMNS)
+        self.gender_rates = GroupRates()
+        self.sketches = {feature: {0: KLLSketch(), 1: KLLSketch()} for feature in SKETCH_COLUMNS}
+
+    def update(self, df):
+        # Gender categorical (dari data_store) diproses lewat kodenya tanpa membuat array string
+        gender = df['gender']
+        if not isinstance(gender.dtype, pd.CategoricalDtype):
+            gender = gender.astype('category')
+        categories = gender.cat.categories.tolist()
+        codes = gender.cat.codes.to_numpy()
+        is_female = codes == categories.index('Female') if 'Female' in categories else np.zeros(len(codes), bool)
+
+        values = np.column_stack([
+            df['age'].to_numpy(np.float64),
+            is_female.astype(np.float64),
+            df['purchase_amount'].to_numpy(np.float64),
+            df['tenure'].to_numpy(np.float64),
+            df['churn'].to_numpy(np.float64),
+        ])
+        self.stats.update(values)
+        churn = df['churn'].to_numpy()
+        self.gender_rates.update_codes(codes, categories, churn)
+        for feature in SKETCH_COLUMNS:
+            values = df[feature].to_numpy(np.float64)
+            for label, sketch in self.sketches[feature].items():
+                sketch.update(values[churn == label])
+        return self
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.gender_rates.merge(other.gender_rates)
+        for feature in SKETCH_COLUMNS:
+            for label, sketch in self.sketches[feature].items():
+                sketch.merge(other.sketches[feature][label])
+        return self
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    @property
+    def churn_rate(self):
+        return float(self.stats.mean['churn'])
+
+    # Sketch kuantil untuk satu fitur, per kelas churn atau gabungan kedua kelas
+    def quantile_sketch(self, feature, churn=None):
+        if churn is not None:
+            return self.sketches[feature][churn]
+        return self.sketches[feature][0].copy().merge(self.sketches[feature][1])
+
+    def quantiles(self, q):
+        q = np.asarray(q, dtype=np.float64)
+        result = {feature: self.quantile_sketch(feature).quantile(q) for feature in SKETCH_COLUMNS}
+        # Kuantil churn (biner) dihitung exact dari churn rate
+        result['churn'] = (q > 1 - self.churn_rate).astype(np.float64)
+        return pd.DataFrame(result, index=[f"{p:.0%}" for p in q])
+
+    # Setara dengan df.describe(); kuartil diperkirakan dari sketch kuantil
+    def describe(self):
+        moments = pd.DataFrame({
+            'count': float(self.count),
+            'mean': self.stats.mean,
+            'std': self.stats.std,
+            'min': pd.Series(self.stats.min_, index=self.stats.columns),
+            'max': pd.Series(self.stats.max_, index=self.stats.columns),
+        }).T[NUMERIC_COLUMNS]
+        quartiles = self.quantiles([0.25, 0.5, 0.75])[NUMERIC_COLUMNS]
+        return pd.concat([moments.iloc[:4], quartiles, moments.iloc[4:]])
+
+    # Statistik boxplot per kelas churn untuk matplotlib Axes.bxp. Whisker 1.5 IQR seperti
+    # seaborn; outlier diambil dari item yang tersimpan di sketch (jumlahnya terbatas) ditambah
+    # min/max exact, sehingga biaya render tidak bergantung pada jumlah baris.
+    def boxplot_stats(self, feature):
+        stats = []
+        for label, sketch in self.sketches[feature].items():
+            if sketch.n == 0:
+                continue
+            q1, med, q3 = sketch.quantile([0.25, 0.5, 0.75])
+            low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            items, _ = sketch.weighted_items()
+            values = np.concatenate([items, [sketch.min_, sketch.max_]])
+            inside = values[(values >= low) & (values <= high)]
+            stats.append({
+                'label': str(label),
+                'q1': q1,
+                'med': med,
+                'q3': q3,
+                'whislo': inside.min() if len(inside) else q1,
+                'whishi': inside.max() if len(inside) else q3,
+                'fliers': np.unique(values[(values < low) | (values > high)]),
+            })
+        return stats
+
+    # Setara dengan df['churn'].value_counts(normalize=True)
+    def churn_distribution(self):
+        return pd.Series({0: 1 - self.churn_rate, 1: self.churn_rate}, name='proportion')
+
+    def churn_counts(self):
+        n_churn = sum(self.gender_rates.positives.values())
+        return pd.Series({0: self.count - n_churn, 1: n_churn}, name='count')
+
+    def correlation(self):
+        return self.stats.correlation
+
+    def churn_correlation(self):
+        return self.stats.correlation['churn'].drop('churn')
+
+    # Setara dengan df.groupby('gender')['churn'].mean()
+    def churn_rate_by_gender(self):
+        return self.gender_rates.rates().rename_axis('gender').rename('churn')
+
+    # Setara dengan pd.crosstab(df['gender'], df['churn'], normalize='index')
+    def gender_churn_crosstab(self):
+        rates = self.churn_rate_by_gender()
+        return pd.DataFrame({0: 1 - rates, 1: rates}).rename_axis(columns='churn')
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'churn_rate': self.churn_rate,
+            'mean': self.stats.mean.to_dict(),
+            'std': self.stats.std.to_dict(),
+            'churn_rate_by_gender': self.churn_rate_by_gender().to_dict(),
+        }
+
+# Fungsi untuk meringkas data pelanggan di disk per batch (memori terbatas)
+def summarize_customer_data(path=PARQUET_PATH, batch_size=ROW_GROUP_SIZE):
+    summary = CustomerSummary()
+    for chunk in iter_customer_data(batch_size=batch_size, path=path):
+        summary.update(chunk)
+    return summary
+
+# Fungsi untuk memuat ringkasan data per row group dari cache di disk. Row group yang belum
+# pernah diringkas (fingerprint baru) dibaca dan diringkas, lalu semua ringkasan digabung.
+# Dengan begitu ringkasan dibangun sekali per versi data.
+def load_data_summary(path=PARQUET_PATH, cache_dir=SUMMARY_CACHE_DIR):
+    fingerprints = row_group_fingerprints(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    parquet_file = open_parquet(path)
+
+    summary = CustomerSummary()
+    for i, fingerprint in enumerate(fingerprints):
+        cache_path = os.path.join(cache_dir, f"rg-{fingerprint}.pkl")
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                row_group_summary = pickle.load(f)
+        else:
+            row_group_summary = CustomerSummary().update(to_frame(parquet_file.read_row_group(i)))
+            tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(row_group_summary, f)
+            os.replace(tmp_path, cache_path)
+        summary.merge(row_group_summary)
+
+    # Hapus ringkasan row group yang tidak lagi ada di data
+    keep = {f"rg-{fingerprint}.pkl" for fingerprint in fingerprints}
+    for name in os.listdir(cache_dir):
+        if name not in keep and '.tmp-' not in name:
+            os.remove(os.path.join(cache_dir, name))
+    return summary
+
+# Fungsi untuk mencetak ringkasan ke stdout (dipakai oleh generator dan training)
+def print_summary(summary):
+    print("\nSummary statistics:")
+    print(summary.describe())
+
+    print("\nChurn distribution:")
+    print(summary.churn_distribution())
+
+    # Check correlation between features and churn
+    print("\nCorrelation with churn:")
+    for col, correlation in summary.churn_correlation().items():
+        print(f"{col}: {correlation:.4f}")
+
+    # Check churn rate by gender
+    print("\nChurn rate by gender:")
+    print(summary.churn_rate_by_gender())
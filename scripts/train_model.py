@@ -1,82 +1,233 @@
-import pandas as pd
-import numpy as np
+import argparse
+import json
+import time
+from contextlib import contextmanager
+
 import pickle
 import os
+from threadpoolctl import threadpool_limits
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 
-def train_churn_model():
-    # Buat direktori models jika belum ada
-    os.makedirs('models', exist_ok=True)
-    
-    # Load data
-    print("Loading data...")
-    df = pd.read_csv('data/customer_data.csv')
-    
-    # Pisahkan fitur dan target
-    X = df.drop('churn', axis=1)
-    y = df['churn']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Preprocessing untuk fitur numerik dan kategorikal
-    numeric_features = ['age', 'purchase_amount', 'tenure']
-    categorical_features = ['gender']
-    
+from scripts.atomic_io import atomic_write
+from scripts.compiled_model import compile_model
+from scripts.data_store import churn_labels, load_customer_data, model_features, write_customer_data
+from scripts.evaluation import ScoreHistogram, print_evaluation
+from scripts.metrics import STAGE_METRIC, observe
+from scripts.model_registry import REGISTRY_DIR, publish_model
+from scripts.score_table import ScoreTable
+from scripts.summary_stats import CustomerSummary
+
+MODEL_PATH = 'models/churn_model.pkl'
+TRAINING_REPORT_PATH = 'models/training_report.json'
+
+# Sampel acak data historis yang disimpan untuk retraining incremental
+RESERVOIR_PATH = 'models/reservoir.parquet'
+RESERVOIR_SIZE = 5000
+
+NUMERIC_FEATURES = ['age', 'purchase_amount', 'tenure']
+CATEGORICAL_FEATURES = ['gender']
+
+# Fungsi untuk menentukan jumlah core yang dipakai training.
+# Default: semua core kecuali satu, agar server Streamlit di host yang sama tetap responsif.
+def resolve_cpu_budget(cpu_budget=None):
+    n_cpus = os.cpu_count() or 1
+    if cpu_budget is None:
+        return max(1, n_cpus - 1)
+    if cpu_budget < 0:
+        # Sama seperti n_jobs sklearn: -1 berarti semua core, -2 semua kecuali satu, dst.
+        return max(1, n_cpus + 1 + cpu_budget)
+    return max(1, min(int(cpu_budget), n_cpus))
+
+# Context manager untuk mencatat wall time setiap fase training (juga sebagai metrik
+# churn_stage_seconds{component="train"} jika instrumentasi aktif)
+@contextmanager
+def timed_phase(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+        observe(STAGE_METRIC, timings[name], stage=name, component='train')
+
+# Fungsi untuk melaporkan progres (0-1) ke callback opsional, misalnya dari job runner
+def report_progress(progress, fraction, message):
+    if progress is not None:
+        progress(fraction, message)
+
+# Fungsi untuk membuat Pipeline model (preprocessing fitur numerik dan kategorikal + random forest)
+def build_pipeline(n_estimators=100, random_state=42, n_jobs=None):
     numeric_transformer = StandardScaler()
     categorical_transformer = OneHotEncoder(drop='first')
     
     preprocessor = ColumnTransformer(
         transformers=[
-            ('num', numeric_transformer, numeric_features),
-            ('cat', categorical_transformer, categorical_features)
+            ('num', numeric_transformer, NUMERIC_FEATURES),
+            ('cat', categorical_transformer, CATEGORICAL_FEATURES)
         ])
     
-    # Definisikan model
-    model = Pipeline(steps=[
+    return Pipeline(steps=[
         ('preprocessor', preprocessor),
-        ('classifier', RandomForestClassifier(n_estimators=100, random_state=42))
+        ('classifier', RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs))
     ])
+
+# Jika salah satu budget serving (p95 latency satu baris, waktu per baris batch, ukuran artifact)
+# diberikan, beberapa kandidat model dibandingkan dan yang terbaik dalam budget dipakai
+# (lihat model_selection.py); tabel tradeoff disimpan di version.json dan training report.
+def train_churn_model(build_score_table=True, cpu_budget=None, progress=None, max_latency_ms=None,
+                      max_batch_us_per_row=None, max_size_mb=None):
+    # Buat direktori models jika belum ada
+    os.makedirs('models', exist_ok=True)
     
-    # Train model
-    print("Training model...")
-    model.fit(X_train, y_train)
-    
-    # Evaluasi model
-    print("Evaluating model...")
-    y_pred = model.predict(X_test)
-    y_pred_proba = model.predict_proba(X_test)[:, 1]
-    
-    print("Classification Report:")
-    print(classification_report(y_test, y_pred))
-    
-    print("Confusion Matrix:")
-    print(confusion_matrix(y_test, y_pred))
-    
-    print(f"ROC AUC Score: {roc_auc_score(y_test, y_pred_proba):.4f}")
+    n_jobs = resolve_cpu_budget(cpu_budget)
+    timings = {}
+    report_progress(progress, 0.0, "Loading data")
     
-    # Simpan model ke file
-    print("Saving model...")
-    with open('models/churn_model.pkl', 'wb') as f:
-        pickle.dump(model, f)
+    # Load data
+    print("Loading data...")
+    with timed_phase(timings, 'load'):
+        df = load_customer_data()
+        summary = CustomerSummary().update(df)
+    print(f"Loaded {summary.count} rows (churn rate {summary.churn_rate:.2%})")
     
-    # Simpan juga informasi fitur untuk inference
-    feature_names = {
-        'numeric_features': numeric_features,
-        'categorical_features': categorical_features
-    }
+    # Pisahkan fitur dan target (data dimuat dengan tipe ringkas, lihat data_store.MEMORY_SCHEMA)
+    X = model_features(df)
+    y = churn_labels(df)
     
-    with open('models/feature_names.pkl', 'wb') as f:
-        pickle.dump(feature_names, f)
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
+    # Definisikan model
+    model = build_pipeline(n_jobs=n_jobs)
+    selection = None
+    
+    # Pohon dibangun paralel dengan n_jobs core, dan thread BLAS/OpenMP dibatasi
+    # ke budget yang sama agar tidak berebut CPU dengan proses lain di host
+    with threadpool_limits(limits=n_jobs):
+        # Train model
+        report_progress(progress, 0.1, "Training model")
+        print(f"Training model on {n_jobs} core(s)...")
+        with timed_phase(timings, 'fit'):
+            if any(budget is not None for budget in (max_latency_ms, max_batch_us_per_row, max_size_mb)):
+                from scripts.model_selection import select_model
+                model, selection = select_model(X_train, y_train, X_test, y_test, max_latency_ms,
+                                                max_batch_us_per_row, max_size_mb, n_jobs=n_jobs)
+            else:
+                model.fit(X_train, y_train)
+        
+        # Evaluasi model
+        report_progress(progress, 0.7, "Evaluating model")
+        print("Evaluating model...")
+        with timed_phase(timings, 'evaluate'):
+            y_pred_proba = model.predict_proba(X_test)[:, 1]
+            evaluation = ScoreHistogram().update(y_test, y_pred_proba)
+    
+    # Model yang disimpan memprediksi single-thread: untuk request kecil di serving,
+    # overhead thread pool joblib lebih besar daripada manfaatnya
+    model.named_steps['classifier'].set_params(n_jobs=None)
+    
+    roc_auc = evaluation.auc()
+    print_evaluation(evaluation)
+    
+    # Simpan model, artifact, dan tabel skor
+    report_progress(progress, 0.8, "Saving model")
+    version = save_trained_model(model, build_score_table=build_score_table, n_jobs=n_jobs, timings=timings,
+                                 info={'source': 'train_model', 'roc_auc': roc_auc, 'rows_seen': len(df),
+                                       'model_selection': selection})
+    
+    # Simpan sampel reservoir dari data historis untuk retraining incremental
+    save_reservoir(df.sample(n=min(RESERVOIR_SIZE, len(df)), random_state=42))
+    
+    print_phase_timings(timings)
+    
+    # Simpan ringkasan training (budget CPU, waktu per fase, metrik) di samping model
+    write_training_report({
+        'model_hash': version['content_hash'],
+        'model_version': version['version'],
+        'cpu_budget': n_jobs,
+        'n_estimators': len(model.named_steps['classifier'].estimators_),
+        'rows_seen': len(df),
+        'n_train': len(X_train),
+        'n_test': len(X_test),
+        'roc_auc': roc_auc,
+        'model_selection': selection,
+        'data_summary': summary.to_dict(),
+        'timings': timings,
+    })
+    
+    report_progress(progress, 1.0, "Done")
     print("Model training completed and saved to models/churn_model.pkl")
     
     return model
 
+# Fungsi untuk menyimpan model ke pickle dan sebagai versi baru di registry (artifact array dan,
+# opsional, tabel skor). Versi baru langsung diaktifkan; server yang berjalan memuatnya otomatis.
+def save_trained_model(model, build_score_table=True, n_jobs=1, timings=None, info=None):
+    timings = {} if timings is None else timings
+    
+    # Simpan model ke file
+    print("Saving model...")
+    with timed_phase(timings, 'save'):
+        atomic_write(MODEL_PATH, lambda f: pickle.dump(model, f))
+        
+        # Simpan juga informasi fitur untuk inference
+        columns = {name: list(cols) for name, _, cols in model.named_steps['preprocessor'].transformers_}
+        feature_names = {
+            'numeric_features': columns['num'],
+            'categorical_features': columns['cat']
+        }
+        
+        atomic_write('models/feature_names.pkl', lambda f: pickle.dump(feature_names, f))
+        compiled_model = compile_model(model)
+    
+    # Precompute probabilitas untuk seluruh grid input form prediksi (lookup O(1) di app)
+    score_table = None
+    if build_score_table:
+        with timed_phase(timings, 'score_table'), threadpool_limits(limits=n_jobs):
+            score_table = ScoreTable.build(compiled_model, predict_transformed=model[-1].predict_proba)
+        print(f"Score table {score_table.table.shape} built")
+    
+    # Simpan artifact array (manifest + .npy, bisa di-mmap) dan tabel skor sebagai versi baru
+    with timed_phase(timings, 'publish'):
+        version = publish_model(compiled_model, score_table, info=info)
+    print(f"Model version {version['version']} saved to {REGISTRY_DIR} (hash {version['content_hash'][:12]})")
+    
+    return version
+
+def save_reservoir(sample):
+    write_customer_data(sample, RESERVOIR_PATH)
+
+def load_training_report():
+    if not os.path.exists(TRAINING_REPORT_PATH):
+        return None
+    with open(TRAINING_REPORT_PATH) as f:
+        return json.load(f)
+
+def write_training_report(report):
+    atomic_write(TRAINING_REPORT_PATH, lambda f: json.dump(report, f, indent=2), mode='w')
+
+def print_phase_timings(timings):
+    print("Phase timings:")
+    for phase, seconds in timings.items():
+        print(f"  {phase:<12} {seconds:8.3f} s")
+
 if __name__ == "__main__":
-    train_churn_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Latih model prediksi churn")
+    parser.add_argument('--cpu-budget', type=int, default=None,
+                        help="Jumlah core untuk training (default: semua core kecuali satu)")
+    parser.add_argument('--no-score-table', action='store_true',
+                        help="Lewati pembuatan tabel skor precomputed")
+    parser.add_argument('--max-latency-ms', type=float, default=None,
+                        help="Budget p95 latency prediksi satu baris (ms); mengaktifkan pemilihan model")
+    parser.add_argument('--max-batch-us-per-row', type=float, default=None,
+                        help="Budget waktu prediksi per baris pada batch (us); mengaktifkan pemilihan model")
+    parser.add_argument('--max-size-mb', type=float, default=None,
+                        help="Budget ukuran artifact model (MB); mengaktifkan pemilihan model")
+    args = parser.parse_args()
+
+    train_churn_model(build_score_table=not args.no_score_table, cpu_budget=args.cpu_budget,
+                      max_latency_ms=args.max_latency_ms, max_batch_us_per_row=args.max_batch_us_per_row,
+                      max_size_mb=args.max_size_mb)
\ No newline at end of file